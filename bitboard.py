@@ -0,0 +1,499 @@
+"""
+Bitboard position backend for search-heavy bots.
+
+A BitBoard keeps one 64-bit integer per piece type and color plus the
+occupancy of each side. Squares follow the same (row, col) layout as
+chess_rules.Board: square = row * 8 + col, so a8 is 0 and h1 is 63.
+
+Moves are plain ints: from_square | to_square << 6 | promotion << 12, where
+promotion is KNIGHT, BISHOP, ROOK or QUEEN, or 0 for a normal move.
+
+Use BitBoard.from_board(board) to switch a chess_rules.Board over to this
+backend and BitBoard.to_board() to get a regular Board back.
+"""
+
+from chess_rules import (Board, ROWS, COLS, Pawn, Knight, Bishop, Rook, Queen, King,
+                         PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING)
+
+# Sides
+COLORS = ('white', 'black')
+WHITE_SIDE, BLACK_SIDE = 0, 1
+
+# Piece types, indexed by the chess_rules type tags
+PIECE_NAMES = ('pawn', 'knight', 'bishop', 'rook', 'queen', 'king')
+PIECE_CLASSES = (Pawn, Knight, Bishop, Rook, Queen, King)
+PROMOTION_TYPES = (QUEEN, ROOK, BISHOP, KNIGHT)
+
+# Castling rights bits
+WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE = 1, 2, 4, 8
+
+EMPTY = -1
+NO_SQUARE = -1
+FULL = (1 << 64) - 1
+
+
+def square(row, col):
+    """Return the square index for a (row, col) pair."""
+    return row * COLS + col
+
+
+def square_name(sq):
+    """Return the algebraic name of a square index, e.g. 52 -> 'e2'."""
+    return f"{chr(sq % COLS + ord('a'))}{ROWS - sq // COLS}"
+
+
+def encode_move(from_sq, to_sq, promotion=0):
+    """Pack a move into an int."""
+    return from_sq | (to_sq << 6) | (promotion << 12)
+
+
+def move_from(move):
+    return move & 63
+
+
+def move_to(move):
+    return (move >> 6) & 63
+
+
+def move_promotion(move):
+    return move >> 12
+
+
+def move_to_uci(move):
+    """Return a move in long algebraic notation, e.g. 'e7e8q'."""
+    promotion = move_promotion(move)
+    suffix = 'nbrq'[promotion - KNIGHT] if promotion else ''
+    return square_name(move_from(move)) + square_name(move_to(move)) + suffix
+
+
+def _build_step_table(offsets):
+    table = []
+    for sq in range(64):
+        row, col = divmod(sq, COLS)
+        bb = 0
+        for dr, dc in offsets:
+            r, c = row + dr, col + dc
+            if 0 <= r < ROWS and 0 <= c < COLS:
+                bb |= 1 << square(r, c)
+        table.append(bb)
+    return table
+
+
+KNIGHT_ATTACKS = _build_step_table([(-2, -1), (-2, 1), (-1, -2), (-1, 2),
+                                    (1, -2), (1, 2), (2, -1), (2, 1)])
+KING_ATTACKS = _build_step_table([(-1, 0), (1, 0), (0, -1), (0, 1),
+                                  (-1, -1), (-1, 1), (1, -1), (1, 1)])
+# PAWN_ATTACKS[side][sq]: squares attacked by a pawn of that side standing on sq
+PAWN_ATTACKS = (_build_step_table([(-1, -1), (-1, 1)]),
+                _build_step_table([(1, -1), (1, 1)]))
+
+# Ray directions as (row, col) steps. The first four increase the square index,
+# so the nearest blocker on those rays is the lowest set bit.
+ROOK_RAYS = ((1, 0), (0, 1), (-1, 0), (0, -1))
+BISHOP_RAYS = ((1, 1), (1, -1), (-1, -1), (-1, 1))
+POSITIVE_RAYS = ((1, 0), (0, 1), (1, 1), (1, -1))
+
+
+def _build_rays():
+    rays = {}
+    for dr, dc in ROOK_RAYS + BISHOP_RAYS:
+        table = []
+        for sq in range(64):
+            row, col = divmod(sq, COLS)
+            bb = 0
+            r, c = row + dr, col + dc
+            while 0 <= r < ROWS and 0 <= c < COLS:
+                bb |= 1 << square(r, c)
+                r += dr
+                c += dc
+            table.append(bb)
+        rays[(dr, dc)] = (table, (dr, dc) in POSITIVE_RAYS)
+    return rays
+
+
+RAYS = _build_rays()
+
+
+def _slider_attacks(sq, occupied, directions):
+    attacks = 0
+    for direction in directions:
+        table, positive = RAYS[direction]
+        ray = table[sq]
+        blockers = ray & occupied
+        if blockers:
+            if positive:
+                blocker = (blockers & -blockers).bit_length() - 1
+            else:
+                blocker = blockers.bit_length() - 1
+            ray ^= table[blocker]
+        attacks |= ray
+    return attacks
+
+
+def rook_attacks(sq, occupied):
+    return _slider_attacks(sq, occupied, ROOK_RAYS)
+
+
+def bishop_attacks(sq, occupied):
+    return _slider_attacks(sq, occupied, BISHOP_RAYS)
+
+
+def _build_between():
+    # BETWEEN[a][b]: squares strictly between a and b on a shared line, else 0
+    between = [[0] * 64 for _ in range(64)]
+    for (dr, dc), (table, _) in RAYS.items():
+        for a in range(64):
+            row, col = divmod(a, COLS)
+            r, c = row + dr, col + dc
+            squares = 0
+            while 0 <= r < ROWS and 0 <= c < COLS:
+                b = square(r, c)
+                between[a][b] = squares
+                squares |= 1 << b
+                r += dr
+                c += dc
+    return between
+
+
+BETWEEN = _build_between()
+
+# Castling rights that survive a move touching each square
+CASTLING_MASK = [15] * 64
+CASTLING_MASK[square(7, 4)] = 15 & ~(WHITE_KINGSIDE | WHITE_QUEENSIDE)
+CASTLING_MASK[square(7, 7)] = 15 & ~WHITE_KINGSIDE
+CASTLING_MASK[square(7, 0)] = 15 & ~WHITE_QUEENSIDE
+CASTLING_MASK[square(0, 4)] = 15 & ~(BLACK_KINGSIDE | BLACK_QUEENSIDE)
+CASTLING_MASK[square(0, 7)] = 15 & ~BLACK_KINGSIDE
+CASTLING_MASK[square(0, 0)] = 15 & ~BLACK_QUEENSIDE
+
+# (right, king from, king to, rook from, rook to, squares that must be empty,
+#  squares the king passes that must not be attacked)
+CASTLING_MOVES = (
+    (WHITE_KINGSIDE, 60, 62, 63, 61, (1 << 61) | (1 << 62), (61, 62)),
+    (WHITE_QUEENSIDE, 60, 58, 56, 59, (1 << 57) | (1 << 58) | (1 << 59), (59, 58)),
+    (BLACK_KINGSIDE, 4, 6, 7, 5, (1 << 5) | (1 << 6), (5, 6)),
+    (BLACK_QUEENSIDE, 4, 2, 0, 3, (1 << 1) | (1 << 2) | (1 << 3), (3, 2)),
+)
+
+RANK_1 = 0xFF << 56
+RANK_8 = 0xFF
+# Rows a pawn lands on after a single push that allows a double push
+DOUBLE_PUSH_ROW = (0xFF << 40, 0xFF << 16)
+
+
+def _squares(bb):
+    """Yield the index of every set bit in a bitboard."""
+    while bb:
+        lsb = bb & -bb
+        yield lsb.bit_length() - 1
+        bb ^= lsb
+
+
+class BitBoard:
+    def __init__(self):
+        """Create the standard starting position."""
+        self.pieces = [[0] * 6, [0] * 6]
+        self.occupied = [0, 0]
+        self.mailbox = [EMPTY] * 64
+        self.side = WHITE_SIDE
+        self.castling = WHITE_KINGSIDE | WHITE_QUEENSIDE | BLACK_KINGSIDE | BLACK_QUEENSIDE
+        self.ep_square = NO_SQUARE
+        self.halfmove_clock = 0
+        self.fullmove_number = 1
+        self.history = []
+
+        back_rank = (ROOK, KNIGHT, BISHOP, QUEEN, KING, BISHOP, KNIGHT, ROOK)
+        for col, ptype in enumerate(back_rank):
+            self._put(BLACK_SIDE, ptype, square(0, col))
+            self._put(BLACK_SIDE, PAWN, square(1, col))
+            self._put(WHITE_SIDE, PAWN, square(6, col))
+            self._put(WHITE_SIDE, ptype, square(7, col))
+
+    @classmethod
+    def empty(cls):
+        """Create a position with no pieces, white to move and no castling rights."""
+        position = cls.__new__(cls)
+        position.pieces = [[0] * 6, [0] * 6]
+        position.occupied = [0, 0]
+        position.mailbox = [EMPTY] * 64
+        position.side = WHITE_SIDE
+        position.castling = 0
+        position.ep_square = NO_SQUARE
+        position.halfmove_clock = 0
+        position.fullmove_number = 1
+        position.history = []
+        return position
+
+    @classmethod
+    def from_board(cls, board):
+        """
+        Build a BitBoard from a chess_rules.Board.
+
+        Castling rights are taken from board.castle_rights combined with the
+        has_moved flags of the king and rook, since Board checks both.
+        """
+        position = cls.empty()
+        for row in range(ROWS):
+            for col in range(COLS):
+                piece = board.board[row][col]
+                if piece != 0:
+                    position._put(0 if piece.is_white else 1, piece.kind, square(row, col))
+
+        position.side = COLORS.index(board.turn)
+        for side, color in enumerate(COLORS):
+            home = 7 if side == WHITE_SIDE else 0
+            king = board.board[home][4]
+            if not isinstance(king, King) or king.color != color or king.has_moved:
+                continue
+            for flag_side, rook_col in (('kingside', 7), ('queenside', 0)):
+                rook = board.board[home][rook_col]
+                if (board.castle_rights[color][flag_side] and isinstance(rook, Rook)
+                        and rook.color == color and not rook.has_moved):
+                    bit = WHITE_KINGSIDE if flag_side == 'kingside' else WHITE_QUEENSIDE
+                    position.castling |= bit << (2 * side)
+
+        if board.en_passant_target is not None:
+            position.ep_square = square(*board.en_passant_target)
+        position.halfmove_clock = board.halfmove_clock
+        position.fullmove_number = board.fullmove_number
+        return position
+
+    def to_board(self, use_pygame_ui=False):
+        """Build an equivalent chess_rules.Board."""
+        board = Board(use_pygame_ui=use_pygame_ui)
+        board.board = [[0 for _ in range(COLS)] for _ in range(ROWS)]
+        for sq in range(64):
+            code = self.mailbox[sq]
+            if code != EMPTY:
+                side, ptype = divmod(code, 6)
+                row, col = divmod(sq, COLS)
+                color = COLORS[side]
+                piece = PIECE_CLASSES[ptype](row, col, color, f"{color}_{PIECE_NAMES[ptype]}")
+                # Kings and rooks that lost their castling rights count as moved
+                if ptype == KING:
+                    piece.has_moved = not self.castling & (3 << (2 * side))
+                elif ptype == ROOK:
+                    piece.has_moved = True
+                    for right, king_from, _, rook_from, _, _, _ in CASTLING_MOVES:
+                        if rook_from == sq and self.castling & right and right & (3 << (2 * side)):
+                            piece.has_moved = False
+                board.board[row][col] = piece
+
+        board.turn = COLORS[self.side]
+        for side, color in enumerate(COLORS):
+            board.castle_rights[color]['kingside'] = bool(self.castling & (WHITE_KINGSIDE << (2 * side)))
+            board.castle_rights[color]['queenside'] = bool(self.castling & (WHITE_QUEENSIDE << (2 * side)))
+        board.en_passant_target = divmod(self.ep_square, COLS) if self.ep_square != NO_SQUARE else None
+        board.halfmove_clock = self.halfmove_clock
+        board.fullmove_number = self.fullmove_number
+        board.in_check[board.turn] = board.is_king_in_check(board.turn)
+        board.zobrist_key = board.compute_zobrist_key()
+        board.board_state_counts = {board.zobrist_key: 1}
+        board.eval_score, board.material_score = board.compute_evaluation()
+        return board
+
+    def _put(self, side, ptype, sq):
+        bit = 1 << sq
+        self.pieces[side][ptype] |= bit
+        self.occupied[side] |= bit
+        self.mailbox[sq] = side * 6 + ptype
+
+    def _remove(self, side, ptype, sq):
+        bit = 1 << sq
+        self.pieces[side][ptype] ^= bit
+        self.occupied[side] ^= bit
+        self.mailbox[sq] = EMPTY
+
+    def _move(self, side, ptype, from_sq, to_sq):
+        bits = (1 << from_sq) | (1 << to_sq)
+        self.pieces[side][ptype] ^= bits
+        self.occupied[side] ^= bits
+        self.mailbox[from_sq] = EMPTY
+        self.mailbox[to_sq] = side * 6 + ptype
+
+    def king_square(self, side):
+        return self.pieces[side][KING].bit_length() - 1
+
+    def attackers_to(self, sq, side, occupied):
+        """Bitboard of pieces of `side` attacking sq, given an occupancy."""
+        pieces = self.pieces[side]
+        return ((PAWN_ATTACKS[side ^ 1][sq] & pieces[PAWN])
+                | (KNIGHT_ATTACKS[sq] & pieces[KNIGHT])
+                | (KING_ATTACKS[sq] & pieces[KING])
+                | (bishop_attacks(sq, occupied) & (pieces[BISHOP] | pieces[QUEEN]))
+                | (rook_attacks(sq, occupied) & (pieces[ROOK] | pieces[QUEEN])))
+
+    def is_square_attacked(self, sq, side):
+        """True if any piece of `side` attacks sq."""
+        return bool(self.attackers_to(sq, side, self.occupied[0] | self.occupied[1]))
+
+    def is_check(self):
+        """True if the side to move is in check."""
+        return self.is_square_attacked(self.king_square(self.side), self.side ^ 1)
+
+    def legal_moves(self):
+        """
+        Return every legal move for the side to move.
+
+        Pinned pieces and check evasion masks are worked out once up front, so
+        moves never have to be played and taken back to test their legality.
+        """
+        us = self.side
+        them = us ^ 1
+        ours = self.pieces[us]
+        theirs = self.pieces[them]
+        own = self.occupied[us]
+        enemy = self.occupied[them]
+        occupied = own | enemy
+        king_sq = ours[KING].bit_length() - 1
+        moves = []
+
+        # King moves, tested with the king lifted off the board so it cannot
+        # hide from a slider behind itself
+        without_king = occupied ^ (1 << king_sq)
+        for to_sq in _squares(KING_ATTACKS[king_sq] & ~own):
+            if not self.attackers_to(to_sq, them, without_king):
+                moves.append(king_sq | (to_sq << 6))
+
+        checkers = self.attackers_to(king_sq, them, occupied)
+        if checkers & (checkers - 1):
+            return moves  # Double check: only the king can move
+
+        if checkers:
+            checker_sq = checkers.bit_length() - 1
+            target_mask = checkers | BETWEEN[king_sq][checker_sq]
+        else:
+            target_mask = FULL
+            for right, king_from, king_to, _, _, empty, passed in CASTLING_MOVES:
+                if (self.castling & right & (3 << (2 * us)) and king_from == king_sq and not occupied & empty
+                        and not any(self.attackers_to(sq, them, occupied) for sq in passed)):
+                    moves.append(king_from | (king_to << 6))
+
+        # Pinned pieces may only move along the line between king and pinner
+        pin_rays = {}
+        snipers = ((rook_attacks(king_sq, enemy) & (theirs[ROOK] | theirs[QUEEN]))
+                   | (bishop_attacks(king_sq, enemy) & (theirs[BISHOP] | theirs[QUEEN])))
+        for sniper_sq in _squares(snipers):
+            between = BETWEEN[king_sq][sniper_sq] & occupied
+            if between and not between & (between - 1) and between & own:
+                pin_rays[between.bit_length() - 1] = BETWEEN[king_sq][sniper_sq] | (1 << sniper_sq)
+
+        not_own = ~own
+        for ptype, attack in ((KNIGHT, None), (BISHOP, bishop_attacks), (ROOK, rook_attacks), (QUEEN, None)):
+            for from_sq in _squares(ours[ptype]):
+                if ptype == KNIGHT:
+                    targets = KNIGHT_ATTACKS[from_sq]
+                elif ptype == QUEEN:
+                    targets = rook_attacks(from_sq, occupied) | bishop_attacks(from_sq, occupied)
+                else:
+                    targets = attack(from_sq, occupied)
+                targets &= not_own & target_mask
+                if from_sq in pin_rays:
+                    targets &= pin_rays[from_sq]
+                for to_sq in _squares(targets):
+                    moves.append(from_sq | (to_sq << 6))
+
+        # Pawns
+        forward = -8 if us == WHITE_SIDE else 8
+        last_rank = RANK_8 if us == WHITE_SIDE else RANK_1
+        empty = ~occupied & FULL
+        for from_sq in _squares(ours[PAWN]):
+            targets = PAWN_ATTACKS[us][from_sq] & enemy
+            one = from_sq + forward
+            if (1 << one) & empty:
+                targets |= 1 << one
+                if (1 << one) & DOUBLE_PUSH_ROW[us] and (1 << (one + forward)) & empty:
+                    targets |= 1 << (one + forward)
+            targets &= target_mask
+            if from_sq in pin_rays:
+                targets &= pin_rays[from_sq]
+            for to_sq in _squares(targets):
+                if (1 << to_sq) & last_rank:
+                    for promotion in PROMOTION_TYPES:
+                        moves.append(from_sq | (to_sq << 6) | (promotion << 12))
+                else:
+                    moves.append(from_sq | (to_sq << 6))
+
+            # En passant is checked by clearing both pawns from the occupancy,
+            # which also catches the rank pin through two pawns
+            ep = self.ep_square
+            if ep != NO_SQUARE and PAWN_ATTACKS[us][from_sq] & (1 << ep):
+                captured_sq = ep - forward
+                after = (occupied ^ (1 << from_sq) ^ (1 << captured_sq)) | (1 << ep)
+                if not (self.attackers_to(king_sq, them, after) & ~(1 << captured_sq)):
+                    moves.append(from_sq | (ep << 6))
+        return moves
+
+    def has_legal_moves(self):
+        return bool(self.legal_moves())
+
+    def is_checkmate(self):
+        return self.is_check() and not self.has_legal_moves()
+
+    def is_stalemate(self):
+        return not self.is_check() and not self.has_legal_moves()
+
+    def make_move(self, move):
+        """Play a legal move. Use unmake_move to take it back."""
+        from_sq = move & 63
+        to_sq = (move >> 6) & 63
+        promotion = move >> 12
+        us = self.side
+        code = self.mailbox[from_sq]
+        ptype = code - 6 * us
+        captured = self.mailbox[to_sq]
+        self.history.append((move, captured, self.castling, self.ep_square, self.halfmove_clock))
+
+        if captured != EMPTY:
+            self._remove(us ^ 1, captured - 6 * (us ^ 1), to_sq)
+        self._move(us, ptype, from_sq, to_sq)
+
+        self.halfmove_clock += 1
+        if ptype == PAWN:
+            self.halfmove_clock = 0
+            if to_sq == self.ep_square:
+                self._remove(us ^ 1, PAWN, to_sq + (8 if us == WHITE_SIDE else -8))
+            elif promotion:
+                self._remove(us, PAWN, to_sq)
+                self._put(us, promotion, to_sq)
+        elif ptype == KING and abs(to_sq - from_sq) == 2:
+            for _, king_from, king_to, rook_from, rook_to, _, _ in CASTLING_MOVES:
+                if king_from == from_sq and king_to == to_sq:
+                    self._move(us, ROOK, rook_from, rook_to)
+        if captured != EMPTY:
+            self.halfmove_clock = 0
+
+        self.ep_square = NO_SQUARE
+        if ptype == PAWN and abs(to_sq - from_sq) == 16:
+            self.ep_square = (from_sq + to_sq) // 2
+        self.castling &= CASTLING_MASK[from_sq] & CASTLING_MASK[to_sq]
+        if us == BLACK_SIDE:
+            self.fullmove_number += 1
+        self.side = us ^ 1
+
+    def unmake_move(self):
+        """Take back the last move played with make_move."""
+        move, captured, self.castling, self.ep_square, self.halfmove_clock = self.history.pop()
+        from_sq = move & 63
+        to_sq = (move >> 6) & 63
+        promotion = move >> 12
+        self.side ^= 1
+        us = self.side
+        if us == BLACK_SIDE:
+            self.fullmove_number -= 1
+        ptype = self.mailbox[to_sq] - 6 * us
+
+        if promotion:
+            self._remove(us, ptype, to_sq)
+            self._put(us, PAWN, to_sq)
+            ptype = PAWN
+        self._move(us, ptype, to_sq, from_sq)
+
+        if captured != EMPTY:
+            self._put(us ^ 1, captured - 6 * (us ^ 1), to_sq)
+        elif ptype == PAWN and to_sq == self.ep_square:
+            self._put(us ^ 1, PAWN, to_sq + (8 if us == WHITE_SIDE else -8))
+        elif ptype == KING and abs(to_sq - from_sq) == 2:
+            for _, king_from, king_to, rook_from, rook_to, _, _ in CASTLING_MOVES:
+                if king_from == from_sq and king_to == to_sq:
+                    self._move(us, ROOK, rook_to, rook_from)
@@ -1,5 +1,15 @@
+import argparse
+import cProfile
+import os
+import pstats
 import random
-from chess_rules import Board, ROWS, COLS, Pawn, King, Knight, Rook, Bishop, Queen
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from chess_rules import Board, ROWS, COLS, Pawn, Move
+from notation import move_to_san
+from game_archive import ArchiveWriter
+from engine_protocol import EngineAgentFactory
+import profiling
 
 USE_PYGAME_UI = False
 
@@ -24,113 +34,368 @@ class RandomAgent:
         move = random.choice(moves)
         return piece, move
 
-def play_game(agent1, agent2):
+class ChessClock:
+    """
+    A chess clock with a base time and a per-move increment, in seconds.
+
+    A base_time of None means the game is untimed.
+    """
+
+    def __init__(self, base_time=None, increment=0.0):
+        self.base_time = base_time
+        self.increment = increment
+        self.remaining = {'white': base_time, 'black': base_time}
+
+    def punch(self, color, elapsed):
+        """
+        Charge a move's thinking time to a player and add the increment.
+
+        Returns:
+            bool: False if the player's flag fell during the move.
+        """
+        if self.base_time is None:
+            return True
+        self.remaining[color] -= elapsed
+        if self.remaining[color] < 0:
+            self.remaining[color] = 0.0
+            return False
+        self.remaining[color] += self.increment
+        return True
+
+def timed_choose_move(agent, board):
+    """
+    Ask an agent for a move, measuring its latency.
+
+    Wall time uses perf_counter and CPU time uses thread_time, which only
+    counts the thread the agent runs in.
+
+    Returns:
+        tuple: (piece, move, wall seconds, CPU seconds, exception or None)
+    """
+    wall_start = time.perf_counter()
+    cpu_start = time.thread_time()
+    try:
+        piece, move = agent.choose_move(board)
+        error = None
+    except Exception as exc:
+        piece, move, error = None, None, exc
+    return piece, move, time.perf_counter() - wall_start, time.thread_time() - cpu_start, error
+
+def referee_move(board, piece, move):
+    """
+    Check an agent's (piece, destination) answer against the legal moves.
+
+    Returns:
+        tuple: (Move, None) for a legal move, or (None, forfeit reason).
+    """
+    if piece is None or move is None:
+        return None, 'no_move'
+    try:
+        start = (piece.row, piece.col)
+        end = (int(move[0]), int(move[1]))
+    except (AttributeError, TypeError, ValueError, IndexError):
+        return None, 'illegal_move'
+    if not (0 <= start[0] < ROWS and 0 <= start[1] < COLS) or board.board[start[0]][start[1]] is not piece:
+        return None, 'illegal_move'
+    for legal_move in board.legal_moves():
+        # Agents can't pick a promotion piece, so pawns always promote to a queen
+        if legal_move.start == start and legal_move.end == end and legal_move.promotion in (None, 'queen'):
+            return legal_move, None
+    return None, 'illegal_move'
+
+def referee_game(white, black, base_time=None, increment=0.0, move_time=None, names=None):
+    """
+    Play one game between two agents under a referee.
+
+    Every answer is checked against the legal move set. An agent forfeits if
+    it returns no move, an illegal move or raises an exception, if its clock
+    runs out, or if a single move takes longer than move_time seconds. Agents
+    with a set_clock(remaining, increment) method are told their remaining
+    time before each move.
+
+    While profiling is enabled, engine calls made during an agent's turn are
+    counted under that agent's name from names ({color: name}, default the
+    color and class name) and the rest under 'referee'.
+
+    Returns:
+        dict: winner ('white', 'black' or 'draw'), termination (the game
+        status, or 'no_move', 'illegal_move', 'error' or 'timeout'), moves
+        (Move list), sans, clock (remaining seconds per color) and latency
+        ({color: [(wall seconds, CPU seconds), ...]}).
+    """
     board = Board(use_pygame_ui=False)
-    agents = {'white': agent1, 'black': agent2}
-    move_log = []
+    agents = {'white': white, 'black': black}
+    clock = ChessClock(base_time, increment)
+    latency = {'white': [], 'black': []}
+    moves = []
+    sans = []
+    names = names or {color: f"{color} {type(agent).__name__}" for color, agent in agents.items()}
 
     while True:
-        current_agent = agents[board.turn]
-        piece, move = current_agent.choose_move(board)
+        color = board.turn
+        agent = agents[color]
+        if hasattr(agent, 'set_clock'):
+            agent.set_clock(clock.remaining[color], clock.increment)
 
-        # Re-check that the piece is still valid
-        if piece is None or board.board[piece.row][piece.col] != piece:
-            continue  # Skip to the next iteration if piece is no longer valid
+        if profiling.enabled:
+            profiling.set_scope(names[color])
+        piece, dest, wall, cpu, error = timed_choose_move(agent, board)
+        latency[color].append((wall, cpu))
+        if profiling.enabled:
+            profiling.record('choose_move', wall)
+            profiling.set_scope(profiling.DEFAULT_SCOPE)
 
-        # Log the move in algebraic notation
-        notation = get_algebraic_notation(board, piece, move)
-        move_log.append(notation)
-
-        # Execute the move, using promotion if the piece is a pawn reaching the last rank
-        board.select_piece(piece.row, piece.col)
-        if isinstance(piece, Pawn) and (move[0] == 0 or move[0] == ROWS - 1):
-            board.promote_pawn(piece, move[0], move[1], promotion_choice='queen')  # Default promotion to Queen
+        forfeit = None
+        if error is not None:
+            forfeit = 'error'
+        elif not clock.punch(color, wall) or (move_time is not None and wall > move_time):
+            forfeit = 'timeout'
         else:
-            board.move_piece(move[0], move[1])
+            move, forfeit = referee_move(board, piece, dest)
+        if forfeit:
+            winner = 'black' if color == 'white' else 'white'
+            termination = forfeit
+            break
+
+        # Log the move in algebraic notation before it is played
+        sans.append(move_to_san(board, move))
+        moves.append(move)
+        board.make_move(move)
 
         # Check game end conditions immediately after the move
-        if board.is_checkmate():
-            result = 'black' if board.turn == 'white' else 'white'
-            break
-        elif board.is_stalemate() or board.is_threefold_repetition() or board.is_fifty_move_rule():
-            result = 'draw'
+        status = board.game_status()
+        if status.winner is not None:
+            winner = status.winner
+            termination = status.status
             break
 
+    return {
+        'winner': winner,
+        'termination': termination,
+        'moves': moves,
+        'sans': sans,
+        'clock': dict(clock.remaining),
+        'latency': latency
+    }
+
+def play_game(agent1, agent2, base_time=None, increment=0.0, move_time=None, archive=None):
+    """
+    Play a game with agent1 as white and agent2 as black.
+
+    If archive (a game_archive.ArchiveWriter) is given, the game is appended to it.
+
+    Returns:
+        tuple: (winner, number of moves, space-separated SAN move log)
+    """
+    game = referee_game(agent1, agent2, base_time, increment, move_time)
+    if archive is not None:
+        archive.write_game(game['moves'], type(agent1).__name__, type(agent2).__name__,
+                           game['winner'], game['termination'])
     # Format move_log as a single space-separated string for game_analyzer
-    return result, len(move_log), " ".join(move_log)
+    return game['winner'], len(game['sans']), " ".join(game['sans'])
+
+def latency_summary(samples):
+    """Return {'moves', 'wall_mean', 'wall_max', 'cpu_mean', 'cpu_max'} for (wall, cpu) samples."""
+    if not samples:
+        return {'moves': 0, 'wall_mean': 0.0, 'wall_max': 0.0, 'cpu_mean': 0.0, 'cpu_max': 0.0}
+    walls = [wall for wall, _ in samples]
+    cpus = [cpu for _, cpu in samples]
+    return {
+        'moves': len(samples),
+        'wall_mean': sum(walls) / len(walls),
+        'wall_max': max(walls),
+        'cpu_mean': sum(cpus) / len(cpus),
+        'cpu_max': max(cpus)
+    }
 
 def get_algebraic_notation(board, piece, move):
-    """Convert a move to algebraic notation format."""
-    if isinstance(piece, Pawn):
-        piece_symbol = ''
-    elif isinstance(piece, Knight):
-        piece_symbol = 'N'
-    elif isinstance(piece, Bishop):
-        piece_symbol = 'B'
-    elif isinstance(piece, Rook):
-        piece_symbol = 'R'
-    elif isinstance(piece, Queen):
-        piece_symbol = 'Q'
-    elif isinstance(piece, King):
-        piece_symbol = 'K'
-    else:
-        piece_symbol = ''
-
-    capture = 'x' if board.board[move[0]][move[1]] != 0 else ''
-    origin_col = chr(piece.col + ord('a'))
-    origin_row = str(ROWS - piece.row)
-    dest_col = chr(move[1] + ord('a'))
-    dest_row = str(ROWS - move[0])
-    
-    if isinstance(piece, King) and abs(move[1] - piece.col) == 2:
-        return 'O-O' if move[1] > piece.col else 'O-O-O'
-
-    promotion = ''
-    if isinstance(piece, Pawn) and (move[0] == 0 or move[0] == ROWS - 1):
-        promotion = '=Q'
-
-    if piece_symbol == '':
-        if capture:
-            notation = f"{origin_col}{capture}{dest_col}{dest_row}{promotion}"
-        else:
-            notation = f"{dest_col}{dest_row}{promotion}"
-    else:
-        notation = f"{piece_symbol}{origin_col}{origin_row}{capture}{dest_col}{dest_row}{promotion}"
-    
-    return notation
+    """Convert a move to standard algebraic notation (SAN), before it is played."""
+    promotion = 'queen' if isinstance(piece, Pawn) and (move[0] == 0 or move[0] == ROWS - 1) else None
+    return move_to_san(board, Move((piece.row, piece.col), move, promotion))
 
 Board.get_algebraic_notation = get_algebraic_notation
 
+def play_tournament_game(game_number, agent1_class, agent2_class, seed, base_time=None, increment=0.0, move_time=None,
+                         profile=False, cprofile_path=None):
+    """
+    Play one tournament game in the current process.
+
+    Agent 1 takes white in odd-numbered games and black in even-numbered ones.
+    The global random module is seeded with `seed` first, so a game can be
+    replayed exactly from its number and seed.
+
+    With profile set, the result includes the game's profiling counters. With
+    cprofile_path set, the game runs under cProfile and its stats are dumped
+    to "<cprofile_path>.<game_number>".
+    """
+    random.seed(seed)
+    agent1_is_white = game_number % 2 == 1
+    white_class, black_class = (agent1_class, agent2_class) if agent1_is_white else (agent2_class, agent1_class)
+    white = white_class('white')
+    try:
+        black = black_class('black')
+    except Exception:
+        # Don't leak white's engine subprocess if black's fails to start
+        if hasattr(white, 'close'):
+            white.close()
+        raise
+
+    agent1_color, agent2_color = ('white', 'black') if agent1_is_white else ('black', 'white')
+    names = {agent1_color: f"agent1 {agent1_class.__name__}", agent2_color: f"agent2 {agent2_class.__name__}"}
+
+    if profile:
+        profiling.reset()
+        profiling.enable()
+    profiler = cProfile.Profile() if cprofile_path else None
+    if profiler:
+        profiler.enable()
+    try:
+        game = referee_game(white, black, base_time, increment, move_time, names)
+    finally:
+        # Engine agents run in subprocesses that must be shut down
+        for agent in (white, black):
+            if hasattr(agent, 'close'):
+                agent.close()
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(f"{cprofile_path}.{game_number}")
+        if profile:
+            profiling.disable()
+
+    result = game['winner']
+    if result == 'draw':
+        agent1_result = 'draw'
+    else:
+        agent1_result = 'win' if (result == 'white') == agent1_is_white else 'loss'
+    return {
+        'game': game_number,
+        'seed': seed,
+        'white': white_class.__name__,
+        'black': black_class.__name__,
+        'winner': result,
+        'termination': game['termination'],
+        'agent1_result': agent1_result,
+        'move_count': len(game['sans']),
+        'notation': " ".join(game['sans']),
+        'moves': game['moves'],
+        'agent1_latency': latency_summary(game['latency'][agent1_color]),
+        'agent2_latency': latency_summary(game['latency'][agent2_color]),
+        'profile': profiling.snapshot() if profile else None
+    }
+
+def run_tournament(agent1_class, agent2_class, num_games, workers=None, seed=0,
+                   base_time=None, increment=0.0, move_time=None, profile=False, cprofile_path=None):
+    """
+    Play num_games games between two agents, spread across a process pool.
+
+    Agents are passed as classes (or any picklable callable taking a color) so
+    each worker builds its own instances. Game i is played with seed `seed + i`
+    and colors alternate between games. The time control and profiling
+    arguments are passed on to play_tournament_game.
+
+    Yields:
+        dict: The details of each game, in the order the games finish.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for game_number in range(1, num_games + 1):
+            yield play_tournament_game(game_number, agent1_class, agent2_class, seed + game_number,
+                                       base_time, increment, move_time, profile, cprofile_path)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(play_tournament_game, game_number, agent1_class, agent2_class, seed + game_number,
+                            base_time, increment, move_time, profile, cprofile_path)
+            for game_number in range(1, num_games + 1)
+        ]
+        for future in as_completed(futures):
+            yield future.result()
+
 def main():
-    num_games = 10
-    agent1 = RandomAgent('white')
-    agent2 = RandomAgent('black')
+    parser = argparse.ArgumentParser(description="Play a tournament between two chess bots.")
+    parser.add_argument('--games', type=int, default=10, help="number of games (default 10)")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: one per core)")
+    parser.add_argument('--seed', type=int, default=0, help="base seed; game i uses seed + i")
+    parser.add_argument('--base-time', type=float, default=None, help="seconds on each clock (default: untimed)")
+    parser.add_argument('--increment', type=float, default=0.0, help="seconds added to a clock after each move")
+    parser.add_argument('--move-time', type=float, default=None, help="forfeit any single move slower than this")
+    parser.add_argument('--archive', metavar='PATH', default=None, help="append every game to a binary game archive")
+    parser.add_argument('--profile', action='store_true',
+                        help="count calls and time in the rules engine per agent and print a report")
+    parser.add_argument('--cprofile', metavar='PATH', default=None,
+                        help="write merged cProfile stats for all games to PATH (view with pstats, snakeviz, flameprof)")
+    parser.add_argument('--engine1', metavar='COMMAND', default=None,
+                        help="run agent 1 as an engine subprocess, e.g. "
+                             "'python engine_protocol.py search_agent:SearchAgent' (default: RandomAgent in-process)")
+    parser.add_argument('--engine2', metavar='COMMAND', default=None, help="run agent 2 as an engine subprocess")
+    parser.add_argument('--ponder', action='store_true', help="let engine subprocesses think on the opponent's time (needs a spare core per engine)")
+    args = parser.parse_args()
+
+    agent1 = EngineAgentFactory(args.engine1, ponder=args.ponder) if args.engine1 else RandomAgent
+    agent2 = EngineAgentFactory(args.engine2, ponder=args.ponder) if args.engine2 else RandomAgent
 
     results = {'white': 0, 'black': 0, 'draw': 0}
-    game_details = []
-
-    for i in range(num_games):
-        result, move_count, move_log = play_game(agent1, agent2)
-        results[result] += 1
-        game_details.append({
-            'game': i + 1,
-            'winner': result,
-            'move_count': move_count,
-            'notation': move_log
-        })
-
-    # Print game details in algebraic notation
-    for game in game_details:
-        print(f"\nGame {game['game']} - Winner: {game['winner']}")
+    agent1_results = {'win': 0, 'draw': 0, 'loss': 0}
+    terminations = {}
+    # Per agent: [moves, total wall seconds, max wall seconds, total CPU seconds]
+    latency_totals = {'agent1': [0, 0.0, 0.0, 0.0], 'agent2': [0, 0.0, 0.0, 0.0]}
+    profile_totals = {}
+    cprofile_parts = []
+
+    # Print game details in algebraic notation as each game finishes
+    games = run_tournament(agent1, agent2, args.games, workers=args.workers, seed=args.seed,
+                           base_time=args.base_time, increment=args.increment, move_time=args.move_time,
+                           profile=args.profile, cprofile_path=args.cprofile)
+    archive = ArchiveWriter(args.archive) if args.archive else None
+    for game in games:
+        if archive is not None:
+            archive.write_result(game)
+        results[game['winner']] += 1
+        agent1_results[game['agent1_result']] += 1
+        terminations[game['termination']] = terminations.get(game['termination'], 0) + 1
+        if game['profile']:
+            profiling.merge(profile_totals, game['profile'])
+        if args.cprofile:
+            cprofile_parts.append(f"{args.cprofile}.{game['game']}")
+        for agent in ('agent1', 'agent2'):
+            latency = game[f'{agent}_latency']
+            totals = latency_totals[agent]
+            totals[0] += latency['moves']
+            totals[1] += latency['wall_mean'] * latency['moves']
+            totals[2] = max(totals[2], latency['wall_max'])
+            totals[3] += latency['cpu_mean'] * latency['moves']
+        print(f"\nGame {game['game']} (seed {game['seed']}) - {game['white']} vs {game['black']} - Winner: {game['winner']} ({game['termination']})")
         print(f"Total Moves: {game['move_count']}")
         print("Game Notation (Algebraic):")
         print(game['notation'])
 
+    if archive is not None:
+        archive.close()
+
     # Summary of results
     print("\nSummary of results:")
     print(f"White wins: {results['white']}")
     print(f"Black wins: {results['black']}")
     print(f"Draws: {results['draw']}")
+    print(f"Agent 1 ({agent1.__name__}) W/D/L: "
+          f"{agent1_results['win']}/{agent1_results['draw']}/{agent1_results['loss']}")
+    print("Terminations: " + ", ".join(f"{name} {count}" for name, count in sorted(terminations.items())))
+    for agent, agent_class in (('agent1', agent1), ('agent2', agent2)):
+        moves, wall_total, wall_max, cpu_total = latency_totals[agent]
+        if moves:
+            print(f"{agent_class.__name__} ({agent}) latency: mean {wall_total / moves * 1000:.2f} ms wall, "
+                  f"{cpu_total / moves * 1000:.2f} ms CPU, max {wall_max * 1000:.2f} ms wall over {moves} moves")
+
+    if args.profile:
+        print("\nProfile (cumulative time, all games):")
+        print(profiling.format_report(profile_totals))
+    if cprofile_parts:
+        stats = pstats.Stats(*cprofile_parts)
+        stats.dump_stats(args.cprofile)
+        for part in cprofile_parts:
+            os.remove(part)
+        print(f"\ncProfile stats written to {args.cprofile}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
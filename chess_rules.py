@@ -1,5 +1,8 @@
-import pygame
 import random
+from collections import namedtuple
+
+# The Pygame UI lives in chess_ui and is only imported when a Board is created
+# with use_pygame_ui=True, so the rules engine runs without pygame installed.
 
 # Constants for board size
 ROWS, COLS = 8, 8
@@ -9,16 +12,43 @@ WHITE = (245, 245, 220)
 BROWN = (139, 69, 19)
 BLUE = (0, 0, 255)
 
+# Offsets used to look outward from a square when detecting attacks
+KNIGHT_OFFSETS = [(-2, -1), (-2, 1), (-1, -2), (-1, 2),
+                  (1, -2), (1, 2), (2, -1), (2, 1)]
+KING_OFFSETS = [(-1, 0), (1, 0), (0, -1), (0, 1),
+                (-1, -1), (-1, 1), (1, -1), (1, 1)]
+ROOK_DIRECTIONS = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+BISHOP_DIRECTIONS = [(-1, -1), (-1, 1), (1, -1), (1, 1)]
+
+# Piece type tags, so hot loops can compare ints instead of chaining isinstance
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(6)
+ROOK_SLIDERS = (ROOK, QUEEN)
+BISHOP_SLIDERS = (BISHOP, QUEEN)
+
 # Piece Classes
 class Piece:
+    # Slots keep pieces small and cheap to create and copy; kind and symbol are
+    # set per subclass
+    __slots__ = ('row', 'col', 'color', 'name', 'is_white', 'has_moved', 'captured')
+    kind = None
+    symbol = None
+
     def __init__(self, row, col, color, name):
         self.row = row
         self.col = col
         self.color = color  
         self.name = name    
+        self.is_white = color == 'white'
         self.has_moved = False
         self.captured = False
 
+    def copy(self):
+        """Return an independent copy of this piece."""
+        piece = self.__class__(self.row, self.col, self.color, self.name)
+        piece.has_moved = self.has_moved
+        piece.captured = self.captured
+        return piece
+
     def move(self, row, col):
         self.row = row
         self.col = col
@@ -28,6 +58,10 @@ class Piece:
         return []
 
 class Pawn(Piece):
+    __slots__ = ()
+    kind = PAWN
+    symbol = 'p'
+
     def get_valid_moves(self, board, en_passant_target=None, avoid_check=True):
         moves = []
         direction = -1 if self.color == 'white' else 1
@@ -59,6 +93,10 @@ class Pawn(Piece):
         return moves
 
 class Rook(Piece):
+    __slots__ = ()
+    kind = ROOK
+    symbol = 'r'
+
     def get_valid_moves(self, board, avoid_check=True):
         moves = []
         # Directions: up, down, left, right
@@ -82,6 +120,10 @@ class Rook(Piece):
         return moves
 
 class Knight(Piece):
+    __slots__ = ()
+    kind = KNIGHT
+    symbol = 'n'
+
     def get_valid_moves(self, board, avoid_check=True):
         moves = []
         # All possible L-shaped moves
@@ -98,6 +140,10 @@ class Knight(Piece):
         return moves
 
 class Bishop(Piece):
+    __slots__ = ()
+    kind = BISHOP
+    symbol = 'b'
+
     def get_valid_moves(self, board, avoid_check=True):
         moves = []
         # Diagonal directions
@@ -121,6 +167,10 @@ class Bishop(Piece):
         return moves
 
 class Queen(Piece):
+    __slots__ = ()
+    kind = QUEEN
+    symbol = 'q'
+
     def get_valid_moves(self, board, avoid_check=True):
         moves = []
         # Combine rook and bishop moves
@@ -145,6 +195,10 @@ class Queen(Piece):
         return moves
 
 class King(Piece):
+    __slots__ = ()
+    kind = KING
+    symbol = 'k'
+
     def get_valid_moves(self, board, castle_rights=None, avoid_check=True):
         moves = []
         # One square in any direction
@@ -192,6 +246,158 @@ class King(Piece):
         return moves
 
 
+# A move from one (row, col) square to another. promotion is 'queen', 'rook',
+# 'bishop' or 'knight' when a pawn reaches the last rank, otherwise None.
+Move = namedtuple('Move', ['start', 'end', 'promotion'], defaults=[None])
+
+# Outcome of a position: status is 'ongoing', 'checkmate', 'stalemate',
+# 'threefold_repetition' or 'fifty_move_rule'; winner is 'white', 'black',
+# 'draw', or None while the game is still going.
+GameStatus = namedtuple('GameStatus', ['status', 'winner'])
+
+PROMOTION_CLASSES = {'queen': Queen, 'rook': Rook, 'bishop': Bishop, 'knight': Knight}
+
+# FEN piece letters
+FEN_PIECES = {'p': Pawn, 'n': Knight, 'b': Bishop, 'r': Rook, 'q': Queen, 'k': King}
+
+# Castling rights lost when a move starts or ends on each square
+CASTLING_SQUARES = {
+    (7, 4): [('white', 'kingside'), ('white', 'queenside')],
+    (7, 7): [('white', 'kingside')],
+    (7, 0): [('white', 'queenside')],
+    (0, 4): [('black', 'kingside'), ('black', 'queenside')],
+    (0, 7): [('black', 'kingside')],
+    (0, 0): [('black', 'queenside')],
+}
+
+
+# Zobrist keys: one random 64-bit number per piece name and square, plus keys
+# for the side to move, each castling right and the en passant file. A fixed
+# seed keeps position keys stable between runs so they can be stored.
+_zobrist_random = random.Random(0x5EED)
+ZOBRIST_PIECES = {
+    f"{color}_{name}": [_zobrist_random.getrandbits(64) for _ in range(ROWS * COLS)]
+    for color in ('white', 'black')
+    for name in ('pawn', 'knight', 'bishop', 'rook', 'queen', 'king')
+}
+ZOBRIST_BLACK_TO_MOVE = _zobrist_random.getrandbits(64)
+ZOBRIST_CASTLING = {
+    (color, side): _zobrist_random.getrandbits(64)
+    for color in ('white', 'black')
+    for side in ('kingside', 'queenside')
+}
+ZOBRIST_EN_PASSANT = [_zobrist_random.getrandbits(64) for _ in range(COLS)]
+
+
+# Evaluation. Board keeps a score from white's point of view up to date in
+# make_move/unmake_move, looked up per piece name and square like the Zobrist
+# keys, so Board.evaluate() costs the same however many pieces are left.
+
+# Piece values in centipawns, indexed by piece kind
+PIECE_VALUES = [100, 320, 330, 500, 900, 0]
+
+# Piece-square tables from white's point of view, row 0 is the 8th rank.
+# Black pieces read them mirrored top to bottom.
+PAWN_TABLE = [
+    [0, 0, 0, 0, 0, 0, 0, 0],
+    [50, 50, 50, 50, 50, 50, 50, 50],
+    [10, 10, 20, 30, 30, 20, 10, 10],
+    [5, 5, 10, 25, 25, 10, 5, 5],
+    [0, 0, 0, 20, 20, 0, 0, 0],
+    [5, -5, -10, 0, 0, -10, -5, 5],
+    [5, 10, 10, -20, -20, 10, 10, 5],
+    [0, 0, 0, 0, 0, 0, 0, 0],
+]
+KNIGHT_TABLE = [
+    [-50, -40, -30, -30, -30, -30, -40, -50],
+    [-40, -20, 0, 0, 0, 0, -20, -40],
+    [-30, 0, 10, 15, 15, 10, 0, -30],
+    [-30, 5, 15, 20, 20, 15, 5, -30],
+    [-30, 0, 15, 20, 20, 15, 0, -30],
+    [-30, 5, 10, 15, 15, 10, 5, -30],
+    [-40, -20, 0, 5, 5, 0, -20, -40],
+    [-50, -40, -30, -30, -30, -30, -40, -50],
+]
+BISHOP_TABLE = [
+    [-20, -10, -10, -10, -10, -10, -10, -20],
+    [-10, 0, 0, 0, 0, 0, 0, -10],
+    [-10, 0, 5, 10, 10, 5, 0, -10],
+    [-10, 5, 5, 10, 10, 5, 5, -10],
+    [-10, 0, 10, 10, 10, 10, 0, -10],
+    [-10, 10, 10, 10, 10, 10, 10, -10],
+    [-10, 5, 0, 0, 0, 0, 5, -10],
+    [-20, -10, -10, -10, -10, -10, -10, -20],
+]
+ROOK_TABLE = [
+    [0, 0, 0, 0, 0, 0, 0, 0],
+    [5, 10, 10, 10, 10, 10, 10, 5],
+    [-5, 0, 0, 0, 0, 0, 0, -5],
+    [-5, 0, 0, 0, 0, 0, 0, -5],
+    [-5, 0, 0, 0, 0, 0, 0, -5],
+    [-5, 0, 0, 0, 0, 0, 0, -5],
+    [-5, 0, 0, 0, 0, 0, 0, -5],
+    [0, 0, 0, 5, 5, 0, 0, 0],
+]
+QUEEN_TABLE = [
+    [-20, -10, -10, -5, -5, -10, -10, -20],
+    [-10, 0, 0, 0, 0, 0, 0, -10],
+    [-10, 0, 5, 5, 5, 5, 0, -10],
+    [-5, 0, 5, 5, 5, 5, 0, -5],
+    [0, 0, 5, 5, 5, 5, 0, -5],
+    [-10, 5, 5, 5, 5, 5, 0, -10],
+    [-10, 0, 5, 0, 0, 0, 0, -10],
+    [-20, -10, -10, -5, -5, -10, -10, -20],
+]
+KING_TABLE = [
+    [-30, -40, -40, -50, -50, -40, -40, -30],
+    [-30, -40, -40, -50, -50, -40, -40, -30],
+    [-30, -40, -40, -50, -50, -40, -40, -30],
+    [-30, -40, -40, -50, -50, -40, -40, -30],
+    [-20, -30, -30, -40, -40, -30, -30, -20],
+    [-10, -20, -20, -20, -20, -20, -20, -10],
+    [20, 20, 0, 0, 0, 0, 20, 20],
+    [20, 30, 10, 0, 0, 10, 30, 20],
+]
+PIECE_SQUARE_TABLES = [PAWN_TABLE, KNIGHT_TABLE, BISHOP_TABLE, ROOK_TABLE, QUEEN_TABLE, KING_TABLE]
+
+# Piece values for static exchange evaluation; the king is worth more than any
+# exchange, so it only ever captures last
+SEE_VALUES = PIECE_VALUES[:KING] + [20000]
+
+# Classic material points (pawn 1, minor 3, rook 5, queen 9), for material counts
+MATERIAL_POINTS = [1, 3, 3, 5, 9, 0]
+
+
+def build_eval_tables(piece_values=PIECE_VALUES, piece_square_tables=PIECE_SQUARE_TABLES):
+    """
+    Combine piece values and piece-square tables into per-square scores.
+
+    Parameters:
+        piece_values (list): Value of each piece kind (PAWN .. KING).
+        piece_square_tables (list): An 8x8 bonus table per piece kind, from
+            white's point of view with row 0 on the 8th rank. Black pieces use
+            them mirrored top to bottom.
+
+    Returns:
+        dict: {piece name: 64 scores by square index}, positive for white
+        pieces and negative for black ones, to pass to Board.set_eval_tables.
+    """
+    tables = {}
+    for kind, name in enumerate(('pawn', 'knight', 'bishop', 'rook', 'queen', 'king')):
+        table = piece_square_tables[kind]
+        tables[f"white_{name}"] = [piece_values[kind] + table[row][col] for row in range(ROWS) for col in range(COLS)]
+        tables[f"black_{name}"] = [-(piece_values[kind] + table[ROWS - 1 - row][col])
+                                   for row in range(ROWS) for col in range(COLS)]
+    return tables
+
+
+DEFAULT_EVAL_TABLES = build_eval_tables()
+MATERIAL_BY_NAME = {
+    f"{color}_{name}": sign * MATERIAL_POINTS[kind]
+    for color, sign in (('white', 1), ('black', -1))
+    for kind, name in enumerate(('pawn', 'knight', 'bishop', 'rook', 'queen', 'king'))
+}
+
 
 class Board:
     def __init__(self, use_pygame_ui=False):
@@ -209,51 +415,262 @@ class Board:
         self.promotion_in_progress = False
         self.board_state_counts = {}
         self.halfmove_clock = 0
+        self.fullmove_number = 1
+        self.kings = {}
+        self.undo_stack = []
+        self.status_cache = None
+        self.move_cache = None
+        self.print_game_over = use_pygame_ui
+        self.zobrist_key = self.compute_zobrist_key()
+        self.board_state_counts[self.zobrist_key] = 1
+        self.eval_tables = DEFAULT_EVAL_TABLES
+        self.eval_score, self.material_score = self.compute_evaluation()
 
         if self.use_pygame_ui:
-            pygame.init()
-            self.win = pygame.display.set_mode((WIDTH, HEIGHT))
-            pygame.display.set_caption('Chess')
+            import chess_ui
+            self.win = chess_ui.create_window('Chess')
             self.images = self.load_images()
 
     def load_images(self):
         """Load images for chess pieces if using Pygame."""
-        pieces = [
-            'white_pawn', 'white_rook', 'white_knight', 'white_bishop', 'white_queen', 'white_king',
-            'black_pawn', 'black_rook', 'black_knight', 'black_bishop', 'black_queen', 'black_king'
-        ]
-        images = {}
-        for piece in pieces:
-            images[piece] = pygame.transform.scale(
-                pygame.image.load(f'images/{piece}.png'), (SQUARE_SIZE, SQUARE_SIZE)
-            )
-        return images
+        import chess_ui
+        return chess_ui.load_images()
+
+    @classmethod
+    def from_fen(cls, fen, use_pygame_ui=False):
+        """
+        Build a Board from a FEN string, without replaying any moves.
+
+        The castling rights, en passant target, halfmove clock and fullmove
+        number fields are all restored. Kings and rooks that have no castling
+        right left are marked as moved, so the per-piece castling checks agree
+        with the castling field.
+
+        Raises:
+            ValueError: If the FEN string can't be parsed.
+        """
+        fields = fen.split()
+        if len(fields) < 4:
+            raise ValueError(f"Invalid FEN: {fen!r}")
+        rows = fields[0].split('/')
+        if len(rows) != ROWS or fields[1] not in ('w', 'b'):
+            raise ValueError(f"Invalid FEN: {fen!r}")
+
+        board = cls(use_pygame_ui=use_pygame_ui)
+        board.board = [[0 for _ in range(COLS)] for _ in range(ROWS)]
+        for row, text in enumerate(rows):
+            col = 0
+            for symbol in text:
+                if symbol.isdigit():
+                    col += int(symbol)
+                    continue
+                if symbol.lower() not in FEN_PIECES or col >= COLS:
+                    raise ValueError(f"Invalid FEN: {fen!r}")
+                piece_class = FEN_PIECES[symbol.lower()]
+                color = 'white' if symbol.isupper() else 'black'
+                piece = piece_class(row, col, color, f"{color}_{piece_class.__name__.lower()}")
+                if piece_class is Pawn:
+                    piece.has_moved = row != (6 if color == 'white' else 1)
+                board.board[row][col] = piece
+                col += 1
+            if col != COLS:
+                raise ValueError(f"Invalid FEN: {fen!r}")
+
+        board.turn = 'white' if fields[1] == 'w' else 'black'
+        castling = fields[2]
+        for color, home in (('white', ROWS - 1), ('black', 0)):
+            kingside_letter, queenside_letter = ('K', 'Q') if color == 'white' else ('k', 'q')
+            board.castle_rights[color] = {
+                'kingside': kingside_letter in castling,
+                'queenside': queenside_letter in castling,
+            }
+            for side, rook_col in (('kingside', COLS - 1), ('queenside', 0)):
+                rook = board.board[home][rook_col]
+                if isinstance(rook, Rook) and rook.color == color:
+                    rook.has_moved = not board.castle_rights[color][side]
+            king = board.find_king(color)
+            if king is not None:
+                king.has_moved = not any(board.castle_rights[color].values()) or (king.row, king.col) != (home, 4)
+
+        if fields[3] != '-':
+            if len(fields[3]) != 2 or fields[3][0] not in 'abcdefgh' or fields[3][1] not in '36':
+                raise ValueError(f"Invalid FEN: {fen!r}")
+            board.en_passant_target = (ROWS - int(fields[3][1]), ord(fields[3][0]) - ord('a'))
+        try:
+            board.halfmove_clock = int(fields[4]) if len(fields) > 4 else 0
+            board.fullmove_number = int(fields[5]) if len(fields) > 5 else 1
+        except ValueError:
+            raise ValueError(f"Invalid FEN: {fen!r}") from None
+
+        board.in_check = {color: board.is_king_in_check(color) for color in ('white', 'black')}
+        board.zobrist_key = board.compute_zobrist_key()
+        board.board_state_counts = {board.zobrist_key: 1}
+        board.eval_score, board.material_score = board.compute_evaluation()
+        return board
+
+    def copy(self):
+        """
+        Return an independent copy of the position.
+
+        Pieces are copied, so moves on the copy don't affect this board. The copy
+        has no UI, no selection and an empty undo stack.
+        """
+        board = self.__class__.__new__(self.__class__)
+        board.__dict__.update(self.__dict__)
+        board.use_pygame_ui = False
+        board.board = [[piece.copy() if piece != 0 else 0 for piece in row] for row in self.board]
+        board.selected_piece = None
+        board.valid_moves = []
+        board.castle_rights = {color: dict(rights) for color, rights in self.castle_rights.items()}
+        board.in_check = dict(self.in_check)
+        board.board_state_counts = dict(self.board_state_counts)
+        board.kings = {}
+        board.undo_stack = []
+        board.move_cache = None
+        return board
 
     def get_fen(self):
-        """Generates the FEN representation of the board."""
-        fen = ""
+        """
+        Generates the FEN representation of the board.
+
+        All six fields are written: placement, side to move, castling rights,
+        en passant target, halfmove clock and fullmove number, so
+        Board.from_fen(board.get_fen()) reproduces the position.
+        """
+        rows = []
         for row in self.board:
+            text = ""
             empty_count = 0
             for piece in row:
                 if piece == 0:
                     empty_count += 1
                 else:
                     if empty_count > 0:
-                        fen += str(empty_count)
+                        text += str(empty_count)
                         empty_count = 0
-                    symbol = piece.name[0].upper() if piece.color == "white" else piece.name[0].lower()
-                    fen += symbol
+                    text += piece.symbol.upper() if piece.is_white else piece.symbol
             if empty_count > 0:
-                fen += str(empty_count)
-            fen += "/"
-        fen = fen[:-1]  # Remove last slash
-        fen += f" {'w' if self.turn == 'white' else 'b'} - - 0 1"  # Add turn, castling, and other FEN details
-        return fen
+                text += str(empty_count)
+            rows.append(text)
+
+        castling = ""
+        for color, letters in (('white', 'KQ'), ('black', 'kq')):
+            if self.castle_rights[color]['kingside']:
+                castling += letters[0]
+            if self.castle_rights[color]['queenside']:
+                castling += letters[1]
+
+        if self.en_passant_target is None:
+            en_passant = "-"
+        else:
+            row, col = self.en_passant_target
+            en_passant = f"{chr(col + ord('a'))}{ROWS - row}"
+
+        return (f"{'/'.join(rows)} {'w' if self.turn == 'white' else 'b'} {castling or '-'} "
+                f"{en_passant} {self.halfmove_clock} {self.fullmove_number}")
+
+    def compute_zobrist_key(self):
+        """
+        Compute the Zobrist key of the current position from scratch.
+
+        make_move keeps self.zobrist_key up to date incrementally; this is only
+        needed after editing self.board or the other state by hand.
+        """
+        key = 0
+        for row in range(ROWS):
+            for col in range(COLS):
+                piece = self.board[row][col]
+                if piece != 0:
+                    key ^= ZOBRIST_PIECES[piece.name][row * COLS + col]
+        if self.turn == 'black':
+            key ^= ZOBRIST_BLACK_TO_MOVE
+        for color, rights in self.castle_rights.items():
+            for side, allowed in rights.items():
+                if allowed:
+                    key ^= ZOBRIST_CASTLING[(color, side)]
+        return key ^ self._en_passant_key()
+
+    def compute_evaluation(self):
+        """
+        Compute the evaluation and material scores from scratch.
+
+        make_move keeps self.eval_score and self.material_score up to date
+        incrementally; this is only needed after editing self.board by hand.
+
+        Returns:
+            tuple: (score from self.eval_tables, material points), both from
+            white's point of view.
+        """
+        score = 0
+        material = 0
+        for row in range(ROWS):
+            for col in range(COLS):
+                piece = self.board[row][col]
+                if piece != 0:
+                    score += self.eval_tables[piece.name][row * COLS + col]
+                    material += MATERIAL_BY_NAME[piece.name]
+        return score, material
+
+    def set_eval_tables(self, tables):
+        """Evaluate with different tables (see build_eval_tables) from now on."""
+        self.eval_tables = tables
+        self.eval_score, self.material_score = self.compute_evaluation()
+
+    def evaluate(self):
+        """
+        Return the evaluation from the side to move's point of view, in constant time.
+
+        This is the material and piece-square score from self.eval_tables;
+        positive means the side to move is better.
+        """
+        return self.eval_score if self.turn == 'white' else -self.eval_score
+
+    def _score_change(self, piece, from_index, to_index, captured_piece, captured_index,
+                      rook, rook_from, rook_to, promoted_piece):
+        """(eval, material) change from white's point of view caused by a move."""
+        tables = self.eval_tables
+        landed = promoted_piece or piece
+        score = tables[landed.name][to_index] - tables[piece.name][from_index]
+        material = MATERIAL_BY_NAME[landed.name] - MATERIAL_BY_NAME[piece.name]
+        if captured_piece is not None:
+            score -= tables[captured_piece.name][captured_index]
+            material -= MATERIAL_BY_NAME[captured_piece.name]
+        if rook is not None:
+            score += tables[rook.name][rook_to] - tables[rook.name][rook_from]
+        return score, material
+
+    def _en_passant_key(self):
+        # The en passant file only counts when a pawn could actually capture there,
+        # otherwise identical positions would hash differently after a double push
+        if self.en_passant_target is None:
+            return 0
+        row, col = self.en_passant_target
+        pawn_row, capturer = (row - 1, 'black') if row == ROWS - 3 else (row + 1, 'white')
+        for c in (col - 1, col + 1):
+            if 0 <= c < COLS:
+                piece = self.board[pawn_row][c]
+                if piece != 0 and piece.kind == PAWN and piece.color == capturer:
+                    return ZOBRIST_EN_PASSANT[col]
+        return 0
+
+    def position_key(self):
+        """
+        Return a 64-bit key identifying the current position.
+
+        The key covers piece placement, side to move, castling rights and the
+        en passant file, and is updated in O(1) per move, so it can be used to
+        index transposition tables and caches.
+        """
+        return self.zobrist_key
 
     def is_square_under_attack(self, row, col, color):
         """
         Check if a specific square (row, col) is under attack by any opponent's piece.
 
+        Instead of generating moves for every enemy piece, this looks outward from
+        the square: knight and king offsets, the two pawn diagonals and the eight
+        sliding rays. Only the first piece met along each ray is considered.
+
         Parameters:
             row (int): The row of the square to check.
             col (int): The column of the square to check.
@@ -262,70 +679,217 @@ class Board:
         Returns:
             bool: True if the square is under attack, False otherwise.
         """
-        opponent_color = 'black' if color == 'white' else 'white'
-        for r in range(ROWS):
-            for c in range(COLS):
-                attacker = self.board[r][c]
-                if attacker != 0 and attacker.color == opponent_color:
-                    # Get valid moves without considering checks to see if attacker can move to (row, col)
-                    attacker_moves = attacker.get_valid_moves(self, avoid_check=False)
-                    if (row, col) in attacker_moves:
+        white = color == 'white'
+        board = self.board
+
+        # Knights
+        for dr, dc in KNIGHT_OFFSETS:
+            r, c = row + dr, col + dc
+            if 0 <= r < ROWS and 0 <= c < COLS:
+                piece = board[r][c]
+                if piece != 0 and piece.kind == KNIGHT and piece.is_white != white:
+                    return True
+
+        # Pawns attack diagonally forward, so look one row behind the square
+        # from the attacker's point of view
+        pawn_row = row - 1 if white else row + 1
+        if 0 <= pawn_row < ROWS:
+            for c in (col - 1, col + 1):
+                if 0 <= c < COLS:
+                    piece = board[pawn_row][c]
+                    if piece != 0 and piece.kind == PAWN and piece.is_white != white:
                         return True
+
+        # Enemy king on an adjacent square
+        for dr, dc in KING_OFFSETS:
+            r, c = row + dr, col + dc
+            if 0 <= r < ROWS and 0 <= c < COLS:
+                piece = board[r][c]
+                if piece != 0 and piece.kind == KING and piece.is_white != white:
+                    return True
+
+        # Sliding pieces: the first piece on each ray decides
+        for directions, sliders in ((ROOK_DIRECTIONS, ROOK_SLIDERS), (BISHOP_DIRECTIONS, BISHOP_SLIDERS)):
+            for dr, dc in directions:
+                r, c = row + dr, col + dc
+                while 0 <= r < ROWS and 0 <= c < COLS:
+                    piece = board[r][c]
+                    if piece != 0:
+                        if piece.is_white != white and piece.kind in sliders:
+                            return True
+                        break
+                    r += dr
+                    c += dc
         return False
+
+    def attackers_to(self, row, col, color=None, xray=False, removed=()):
+        """
+        Find every piece attacking a square, looking outward from it.
+
+        Parameters:
+            row (int): The row of the square.
+            col (int): The column of the square.
+            color (str): Only return attackers of this color. If None, return
+                both colors.
+            xray (bool): Also return sliders lined up behind another attacker
+                on the same ray (a rook behind a rook or queen, a bishop or
+                queen behind a pawn), which attack once the front piece has
+                captured.
+            removed (set): (row, col) squares to treat as empty.
+
+        Returns:
+            list: The attacking pieces if color is given, otherwise
+            {'white': [...], 'black': [...]}.
+        """
+        board = self.board
+        attackers = []
+
+        # Knights and kings
+        for offsets, kind in ((KNIGHT_OFFSETS, KNIGHT), (KING_OFFSETS, KING)):
+            for dr, dc in offsets:
+                r, c = row + dr, col + dc
+                if 0 <= r < ROWS and 0 <= c < COLS:
+                    piece = board[r][c]
+                    if piece != 0 and piece.kind == kind and (r, c) not in removed:
+                        attackers.append(piece)
+
+        # Pawns: white ones from the row below the square, black ones from the row above
+        for pawn_row, is_white in ((row + 1, True), (row - 1, False)):
+            if 0 <= pawn_row < ROWS:
+                for c in (col - 1, col + 1):
+                    if 0 <= c < COLS:
+                        piece = board[pawn_row][c]
+                        if (piece != 0 and piece.kind == PAWN and piece.is_white == is_white
+                                and (pawn_row, c) not in removed):
+                            attackers.append(piece)
+
+        # Sliding pieces: the first piece on each ray, or the whole battery with xray
+        for directions, sliders in ((ROOK_DIRECTIONS, ROOK_SLIDERS), (BISHOP_DIRECTIONS, BISHOP_SLIDERS)):
+            for dr, dc in directions:
+                r, c = row + dr, col + dc
+                while 0 <= r < ROWS and 0 <= c < COLS:
+                    piece = board[r][c]
+                    if piece != 0 and (r, c) not in removed:
+                        if piece.kind in sliders:
+                            attackers.append(piece)
+                        elif not (xray and r == row + dr and c == col + dc and piece in attackers):
+                            # Only an adjacent pawn or king that attacks the square can be seen through
+                            break
+                        if not xray:
+                            break
+                    r += dr
+                    c += dc
+
+        if color is None:
+            return {
+                'white': [piece for piece in attackers if piece.is_white],
+                'black': [piece for piece in attackers if not piece.is_white],
+            }
+        return [piece for piece in attackers if piece.color == color]
+
+    def see(self, move):
+        """
+        Static exchange evaluation of a move.
+
+        Plays out the exchange on the destination square with both sides
+        always recapturing with their least valuable attacker, either side
+        free to stop when going on would lose material. Pieces revealed behind
+        a capturer join in, but pins are ignored.
+
+        Parameters:
+            move (Move or tuple): (start, end) or (start, end, promotion).
+
+        Returns:
+            int: The material the moving side can expect to win, in
+            PIECE_VALUES centipawns. Negative for losing captures, and for
+            quiet moves onto squares the opponent wins material on.
+        """
+        (from_row, from_col), (row, col) = move[0], move[1]
+        piece = self.board[from_row][from_col]
+        target = self.board[row][col]
+        removed = {(from_row, from_col)}
+
+        gain = [SEE_VALUES[target.kind] if target != 0 else 0]
+        attacker_value = SEE_VALUES[piece.kind]
+        if piece.kind == PAWN:
+            if target == 0 and from_col != col:
+                # En passant
+                gain[0] = SEE_VALUES[PAWN]
+                removed.add((from_row, col))
+            if row == 0 or row == ROWS - 1:
+                promotion = move[2] if len(move) > 2 and move[2] else 'queen'
+                promoted_value = SEE_VALUES[PROMOTION_CLASSES[promotion].kind]
+                gain[0] += promoted_value - SEE_VALUES[PAWN]
+                attacker_value = promoted_value
+
+        side = 'black' if piece.color == 'white' else 'white'
+        while True:
+            # What the side to capture would stand at if it takes the last capturer
+            gain.append(attacker_value - gain[-1])
+            if max(-gain[-2], gain[-1]) < 0:
+                break
+            attackers = self.attackers_to(row, col, side, removed=removed)
+            if not attackers:
+                break
+            attacker = min(attackers, key=lambda candidate: SEE_VALUES[candidate.kind])
+            removed.add((attacker.row, attacker.col))
+            attacker_value = SEE_VALUES[attacker.kind]
+            side = 'black' if side == 'white' else 'white'
+
+        # The last entry assumed a capture that never happened
+        gain.pop()
+        for depth in range(len(gain) - 1, 0, -1):
+            gain[depth - 1] = -max(-gain[depth - 1], gain[depth])
+        return gain[0]
+
+    def find_king(self, color):
+        """
+        Return the King of the given color, or None if it is not on the board.
+
+        The King found last time is remembered and reused as long as it is still
+        standing on its own square, so repeated lookups don't rescan the board.
+        """
+        king = self.kings.get(color)
+        if king is not None and self.board[king.row][king.col] is king:
+            return king
+        for row in range(ROWS):
+            for col in range(COLS):
+                piece = self.board[row][col]
+                if piece != 0 and piece.kind == KING and piece.color == color:
+                    self.kings[color] = piece
+                    return piece
+        self.kings[color] = None
+        return None
         
     def draw(self, win):
         """Draw all pieces and highlight valid moves if using Pygame."""
         if self.use_pygame_ui:
-            # Draw each piece at the correct location and scale it based on SQUARE_SIZE
-            for row in range(ROWS):
-                for col in range(COLS):
-                    piece = self.board[row][col]
-                    if piece != 0:
-                        # Resize the piece image to fit SQUARE_SIZE
-                        piece_image = pygame.transform.scale(self.images[piece.name], (SQUARE_SIZE, SQUARE_SIZE))
-                        win.blit(piece_image, (col * SQUARE_SIZE, row * SQUARE_SIZE))
-
-            # Highlight selected piece and valid moves
-            if self.selected_piece:
-                # Draw a rectangle around the selected piece
-                pygame.draw.rect(win, BLUE, 
-                                (self.selected_piece.col * SQUARE_SIZE, 
-                                self.selected_piece.row * SQUARE_SIZE, 
-                                SQUARE_SIZE, SQUARE_SIZE), 3)
-
-                # Draw circles on valid move squares
-                for move in self.valid_moves:
-                    row, col = move
-                    pygame.draw.circle(win, BLUE, 
-                                    (col * SQUARE_SIZE + SQUARE_SIZE // 2, 
-                                        row * SQUARE_SIZE + SQUARE_SIZE // 2), 10)
+            import chess_ui
+            chess_ui.draw_board(self, win)
 
-    def is_king_in_check(self, color):
-        king = None
-        for row in range(ROWS):
-            for col in range(COLS):
-                piece = self.board[row][col]
-                if isinstance(piece, King) and piece.color == color:
-                    king = piece
-                    break
-            if king:
-                break
+    def display_game_over(self, win, message):
+        """Show a game over message if using Pygame."""
+        if self.use_pygame_ui:
+            import chess_ui
+            return chess_ui.display_game_over(win, message)
 
+    def is_king_in_check(self, color):
+        king = self.find_king(color)
         if not king:
             return False
-
-        for row in range(ROWS):
-            for col in range(COLS):
-                piece = self.board[row][col]
-                if piece != 0 and piece.color != color:
-                    if (king.row, king.col) in piece.get_valid_moves(self, avoid_check=False):
-                        return True
-        return False
+        return self.is_square_under_attack(king.row, king.col, color)
 
     def is_in_check_after_move(self, piece, move):
         original_row, original_col = piece.row, piece.col
         target_piece = self.board[move[0]][move[1]]
 
+        # An en passant capture also removes the pawn beside the capturing one
+        en_passant_square = None
+        if piece.kind == PAWN and target_piece == 0 and move[1] != original_col:
+            en_passant_square = (original_row, move[1])
+            en_passant_pawn = self.board[original_row][move[1]]
+            self.board[original_row][move[1]] = 0
+
         # Simulate the move
         self.board[original_row][original_col] = 0
         self.board[move[0]][move[1]] = piece
@@ -337,9 +901,151 @@ class Board:
         self.board[original_row][original_col] = piece
         self.board[move[0]][move[1]] = target_piece
         piece.row, piece.col = original_row, original_col
+        if en_passant_square:
+            self.board[original_row][move[1]] = en_passant_pawn
 
         return in_check
 
+    def _find_checks_and_pins(self, king):
+        """
+        Look outward from the king once to find what is checking it and which
+        friendly pieces are pinned to it.
+
+        Returns:
+            tuple: (checkers, block_squares, pins) where checkers counts the
+            checking pieces, block_squares is the set of squares that capture or
+            block a single check, and pins maps a pinned piece's (row, col) to
+            the (dr, dc) direction of the pin.
+        """
+        board = self.board
+        color = king.color
+        opponent_color = 'black' if color == 'white' else 'white'
+        checkers = 0
+        block_squares = set()
+        pins = {}
+
+        for directions, sliders in ((ROOK_DIRECTIONS, ROOK_SLIDERS), (BISHOP_DIRECTIONS, BISHOP_SLIDERS)):
+            for dr, dc in directions:
+                ray = []
+                shield = None
+                r, c = king.row + dr, king.col + dc
+                while 0 <= r < ROWS and 0 <= c < COLS:
+                    piece = board[r][c]
+                    ray.append((r, c))
+                    if piece != 0:
+                        if piece.color == color:
+                            if shield is not None:
+                                break
+                            shield = (r, c)
+                        else:
+                            if piece.kind in sliders:
+                                if shield is None:
+                                    checkers += 1
+                                    block_squares.update(ray)
+                                else:
+                                    pins[shield] = (dr, dc)
+                            break
+                    r += dr
+                    c += dc
+
+        for dr, dc in KNIGHT_OFFSETS:
+            r, c = king.row + dr, king.col + dc
+            if 0 <= r < ROWS and 0 <= c < COLS:
+                piece = board[r][c]
+                if piece != 0 and piece.kind == KNIGHT and piece.color == opponent_color:
+                    checkers += 1
+                    block_squares.add((r, c))
+
+        pawn_row = king.row - 1 if color == 'white' else king.row + 1
+        if 0 <= pawn_row < ROWS:
+            for c in (king.col - 1, king.col + 1):
+                if 0 <= c < COLS:
+                    piece = board[pawn_row][c]
+                    if piece != 0 and piece.kind == PAWN and piece.color == opponent_color:
+                        checkers += 1
+                        block_squares.add((pawn_row, c))
+
+        return checkers, block_squares, pins
+
+    def legal_moves(self):
+        """
+        Generate every legal Move for the side to move.
+
+        Checks and pins are worked out once for the position, so ordinary moves
+        are accepted or rejected without simulating them. Only king steps and en
+        passant captures are tested individually. Pawn moves to the last rank are
+        generated once per promotion piece. The (start, end) pairs match what each
+        piece's get_valid_moves returns through select_piece.
+
+        Don't change the board between steps of the generator; making a move and
+        taking it back with unmake_move before the next step is fine.
+        """
+        color = self.turn
+        king = self.find_king(color)
+        if king is None:
+            return
+        board = self.board
+        king_row, king_col = king.row, king.col
+        checkers, block_squares, pins = self._find_checks_and_pins(king)
+
+        # King steps are tested with the king lifted off the board so it can't
+        # shield the squares behind it from a slider
+        king_targets = []
+        board[king_row][king_col] = 0
+        for dr, dc in KING_OFFSETS:
+            r, c = king_row + dr, king_col + dc
+            if 0 <= r < ROWS and 0 <= c < COLS:
+                target = board[r][c]
+                if (target == 0 or target.color != color) and not self.is_square_under_attack(r, c, color):
+                    king_targets.append((r, c))
+        board[king_row][king_col] = king
+
+        # Castling
+        if not checkers and not king.has_moved:
+            rights = self.castle_rights[color]
+            for side, step, rook_col in (('kingside', 1, king_col + 3), ('queenside', -1, king_col - 4)):
+                if not rights[side] or not 0 <= rook_col < COLS:
+                    continue
+                rook = board[king_row][rook_col]
+                if rook == 0 or rook.kind != ROOK or rook.has_moved:
+                    continue
+                between = range(min(king_col, rook_col) + 1, max(king_col, rook_col))
+                if any(board[king_row][c] != 0 for c in between):
+                    continue
+                if not any(self.is_square_under_attack(king_row, king_col + step * i, color) for i in (1, 2)):
+                    king_targets.append((king_row, king_col + 2 * step))
+
+        for target in king_targets:
+            yield Move((king_row, king_col), target)
+
+        if checkers > 1:
+            return  # Double check: only the king can move
+
+        for row in range(ROWS):
+            for col in range(COLS):
+                piece = board[row][col]
+                if piece == 0 or piece.color != color or piece is king:
+                    continue
+                pin = pins.get((row, col))
+                for target in piece.get_valid_moves(self, avoid_check=False):
+                    if checkers and target not in block_squares:
+                        continue
+                    if pin and (target[0] - king_row) * pin[1] != (target[1] - king_col) * pin[0]:
+                        continue
+                    if piece.kind == PAWN and (target[0] == 0 or target[0] == ROWS - 1):
+                        for promotion in PROMOTION_CLASSES:
+                            yield Move((row, col), target, promotion)
+                    else:
+                        yield Move((row, col), target)
+
+                # En passant can uncover the king along the rank, so simulate it
+                if piece.kind == PAWN and self.en_passant_target:
+                    target = self.en_passant_target
+                    direction = -1 if color == 'white' else 1
+                    if (abs(target[1] - col) == 1 and row + direction == target[0]
+                            and not self.is_in_check_after_move(piece, target)):
+                        yield Move((row, col), target)
+
     def create_board(self):
         board = [[0 for _ in range(COLS)] for _ in range(ROWS)]
         
@@ -381,61 +1087,15 @@ class Board:
         if promotion_choice is None:
             promotion_choice = random.choice(['queen', 'rook', 'bishop', 'knight'])
 
-        # Promote the pawn to the chosen piece
-        if promotion_choice == 'queen':
-            self.board[row][col] = Queen(row, col, pawn.color, f"{pawn.color}_queen")
-        elif promotion_choice == 'rook':
-            self.board[row][col] = Rook(row, col, pawn.color, f"{pawn.color}_rook")
-        elif promotion_choice == 'bishop':
-            self.board[row][col] = Bishop(row, col, pawn.color, f"{pawn.color}_bishop")
-        elif promotion_choice == 'knight':
-            self.board[row][col] = Knight(row, col, pawn.color, f"{pawn.color}_knight")
-
-        # Remove the original pawn after promotion
-        self.board[pawn.row][pawn.col] = 0
+        # Promote the pawn to the chosen piece and change turn
+        self.make_move(Move((pawn.row, pawn.col), (row, col), promotion_choice))
         self.promotion_in_progress = False
-        self.change_turn()  # Change turn after promotion
+        self.selected_piece = None
+        self.valid_moves = []
 
     def choose_promotion_piece(self, color):
-        piece_options = ['queen', 'rook', 'bishop', 'knight']
-        piece_images = {
-            'queen': self.images[f"{color}_queen"],
-            'rook': self.images[f"{color}_rook"],
-            'bishop': self.images[f"{color}_bishop"],
-            'knight': self.images[f"{color}_knight"]
-        }
-        
-        # Display options for promotion
-        self.win.fill(WHITE)
-        prompt_font = pygame.font.Font(None, 36)
-        prompt_text = prompt_font.render("Choose a piece for promotion:", True, (0, 0, 0))
-        self.win.blit(prompt_text, (WIDTH // 2 - prompt_text.get_width() // 2, HEIGHT // 4))
-
-        # Calculate even spacing and place each piece centered
-        option_width = SQUARE_SIZE
-        total_width = len(piece_options) * option_width + (len(piece_options) - 1) * 10
-        start_x = (WIDTH - total_width) // 2
-
-        for i, piece in enumerate(piece_options):
-            x = start_x + i * (option_width + 10)
-            y = HEIGHT // 2
-            self.win.blit(piece_images[piece], (x, y))
-            pygame.draw.rect(self.win, (0, 0, 0), (x, y, option_width, option_width), 2)
-
-        pygame.display.flip()
-
-        # Wait for user to select a piece
-        while True:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    exit()
-                elif event.type == pygame.MOUSEBUTTONDOWN:
-                    x, y = event.pos
-                    for i, piece in enumerate(piece_options):
-                        px = start_x + i * (option_width + 10)
-                        if px <= x <= px + option_width and y >= HEIGHT // 2:
-                            return piece
+        import chess_ui
+        return chess_ui.choose_promotion_piece(self, color)
 
     def select_piece(self, row, col):
         if self.promotion_in_progress:
@@ -450,117 +1110,278 @@ class Board:
             piece = self.board[row][col]
             if piece != 0 and piece.color == self.turn:
                 self.selected_piece = piece
-                # Get valid moves
-                if isinstance(piece, King):
-                    self.valid_moves = piece.get_valid_moves(self, castle_rights=self.castle_rights, avoid_check=True)
-                elif isinstance(piece, Pawn):
-                    self.valid_moves = piece.get_valid_moves(self, en_passant_target=self.en_passant_target, avoid_check=True)
-                else:
-                    self.valid_moves = piece.get_valid_moves(self, avoid_check=True)
-                self.valid_moves = [move for move in self.valid_moves if not self.is_in_check_after_move(piece, move)]
+                # Legal moves come from the per-position map, already filtered for check
+                self.valid_moves = list(self.legal_move_map().get((row, col), []))
 
     def move_piece(self, row, col):
         if (row, col) in self.valid_moves:
-            captured_piece = None
-            
-            # Handle En Passant
-            if isinstance(self.selected_piece, Pawn) and self.en_passant_target == (row, col):
-                captured_piece = self.board[self.selected_piece.row][col]
-                self.board[self.selected_piece.row][col] = 0
-
-            # Track en passant target if a pawn moves two squares
-            if isinstance(self.selected_piece, Pawn) and abs(row - self.selected_piece.row) == 2:
-                self.en_passant_target = ((row + self.selected_piece.row) // 2, self.selected_piece.col)
-            else:
-                self.en_passant_target = None
-
-            # Handle Castling
-            if isinstance(self.selected_piece, King):
-                if col - self.selected_piece.col == 2:  # Kingside castling
-                    rook = self.board[row][col + 1]
-                    self.board[row][col - 1] = rook
-                    self.board[row][col + 1] = 0
-                    rook.move(row, col - 1)
-                elif col - self.selected_piece.col == -2:  # Queenside castling
-                    rook = self.board[row][col - 2]
-                    self.board[row][col + 1] = rook
-                    self.board[row][col - 2] = 0
-                    rook.move(row, col + 1)
-
-            # Determine if a piece was captured (excluding en passant)
-            target_piece = self.board[row][col]
-            if target_piece != 0 and target_piece.color != self.selected_piece.color:
-                captured_piece = target_piece
+            piece = self.selected_piece
 
             # Handle Pawn Promotion
-            if isinstance(self.selected_piece, Pawn) and (row == 0 or row == ROWS - 1):
-                self.promote_pawn(self.selected_piece, row, col)
-                self.selected_piece = None
-                self.valid_moves = []
+            if isinstance(piece, Pawn) and (row == 0 or row == ROWS - 1):
+                self.promote_pawn(piece, row, col)
             else:
-                # Move the piece
-                self.board[self.selected_piece.row][self.selected_piece.col] = 0
-                self.selected_piece.move(row, col)
-                self.board[row][col] = self.selected_piece
-                self.change_turn(captured_piece=captured_piece)
-                self.selected_piece = None
-                self.valid_moves = []
+                self.make_move(Move((piece.row, piece.col), (row, col)))
+            self.selected_piece = None
+            self.valid_moves = []
 
-            # Check for game over conditions
-            if self.is_checkmate():
-                print(f"{self.turn.capitalize()} is checkmated! {'Black' if self.turn == 'white' else 'White'} wins!")
-            elif self.is_stalemate():
-                print("Stalemate! It's a draw!")
-            elif self.is_threefold_repetition():
-                print("Threefold Repetition! It's a draw!")
-            elif self.is_fifty_move_rule():
-                print("50-Move Rule! It's a draw!")
+            # Announce game over conditions when asked to (the Pygame UI does)
+            if self.print_game_over:
+                message = self.game_over_message()
+                if message:
+                    print(message)
             return True
         return False
 
-    def change_turn(self, captured_piece=None):
+    def make_move(self, move):
+        """
+        Play a move directly, without going through select_piece/move_piece.
+
+        The move is not checked for legality and nothing is printed. Everything
+        the move changes is pushed onto the undo stack so unmake_move can put the
+        board back exactly as it was, which lets a search walk a game tree in
+        place instead of copying the Board.
+
+        Parameters:
+            move (Move or tuple): (start, end) or (start, end, promotion), where
+                start and end are (row, col) squares. A pawn reaching the last rank
+                is promoted to a queen unless another promotion is given.
+        """
+        (from_row, from_col), (to_row, to_col) = move[0], move[1]
+        promotion = move[2] if len(move) > 2 else None
+        piece = self.board[from_row][from_col]
+        captured_piece = self.board[to_row][to_col] or None
+        captured_square = (to_row, to_col)
+        has_moved = piece.has_moved
+        castled_rook = None
+        rook = rook_from = rook_to = None
+        promoted_piece = None
+        piece_keys = ZOBRIST_PIECES
+        key = self.zobrist_key ^ self._en_passant_key()
+
+        # Handle En Passant
+        if piece.kind == PAWN and captured_piece is None and from_col != to_col:
+            captured_square = (from_row, to_col)
+            captured_piece = self.board[from_row][to_col]
+            self.board[from_row][to_col] = 0
+
+        # Handle Castling
+        if piece.kind == KING and abs(to_col - from_col) == 2:
+            rook_col, rook_target = (COLS - 1, to_col - 1) if to_col > from_col else (0, to_col + 1)
+            rook = self.board[from_row][rook_col]
+            castled_rook = (rook, rook_col, rook.has_moved)
+            rook_from, rook_to = from_row * COLS + rook_col, from_row * COLS + rook_target
+            key ^= piece_keys[rook.name][rook_from] ^ piece_keys[rook.name][rook_to]
+            self.board[from_row][rook_col] = 0
+            self.board[from_row][rook_target] = rook
+            rook.move(from_row, rook_target)
+
+        if captured_piece is not None:
+            captured_piece.captured = True
+            key ^= piece_keys[captured_piece.name][captured_square[0] * COLS + captured_square[1]]
+
+        # Move the piece
+        self.board[from_row][from_col] = 0
+        piece.move(to_row, to_col)
+        self.board[to_row][to_col] = piece
+
+        # Handle Pawn Promotion
+        if piece.kind == PAWN and (to_row == 0 or to_row == ROWS - 1):
+            promotion = promotion or 'queen'
+            promoted_piece = PROMOTION_CLASSES[promotion](to_row, to_col, piece.color, f"{piece.color}_{promotion}")
+            promoted_piece.has_moved = True
+            self.board[to_row][to_col] = promoted_piece
+        key ^= piece_keys[piece.name][from_row * COLS + from_col]
+        key ^= piece_keys[(promoted_piece or piece).name][to_row * COLS + to_col]
+        score, material = self._score_change(
+            piece, from_row * COLS + from_col, to_row * COLS + to_col,
+            captured_piece, captured_square[0] * COLS + captured_square[1],
+            rook, rook_from, rook_to, promoted_piece)
+        self.eval_score += score
+        self.material_score += material
+
+        self.undo_stack.append((
+            Move((from_row, from_col), (to_row, to_col), promotion if promoted_piece else None),
+            piece, has_moved, captured_piece, captured_square, castled_rook, promoted_piece,
+            self.castle_rights, self.en_passant_target, self.halfmove_clock, dict(self.in_check),
+            self.zobrist_key,
+        ))
+
+        # Track en passant target if a pawn moves two squares
+        if piece.kind == PAWN and abs(to_row - from_row) == 2:
+            self.en_passant_target = ((to_row + from_row) // 2, from_col)
+        else:
+            self.en_passant_target = None
+
+        # Moving the king or a rook, or capturing a rook, gives up castling rights
+        lost_rights = CASTLING_SQUARES.get((from_row, from_col), []) + CASTLING_SQUARES.get((to_row, to_col), [])
+        if lost_rights:
+            self.castle_rights = {color: dict(rights) for color, rights in self.castle_rights.items()}
+            for color, side in lost_rights:
+                if self.castle_rights[color][side]:
+                    self.castle_rights[color][side] = False
+                    key ^= ZOBRIST_CASTLING[(color, side)]
+
+        self.zobrist_key = key ^ self._en_passant_key()
+        self.change_turn(captured_piece=captured_piece, moved_piece=piece)
+
+    def last_move(self):
+        """Return the last Move played with make_move, or None."""
+        return self.undo_stack[-1][0] if self.undo_stack else None
+
+    def unmake_move(self):
+        """
+        Take back the last move played with make_move (or move_piece).
+
+        Restores piece positions, captured and promoted pieces, castling rights,
+        the en passant target, the halfmove clock, check flags and the repetition
+        count of the position being left.
+
+        Returns:
+            Move: The move that was taken back.
+        """
+        key = self.zobrist_key
+        self.board_state_counts[key] -= 1
+        if not self.board_state_counts[key]:
+            del self.board_state_counts[key]
+
+        (move, piece, has_moved, captured_piece, captured_square, castled_rook, promoted_piece,
+         self.castle_rights, self.en_passant_target, self.halfmove_clock, self.in_check,
+         self.zobrist_key) = self.undo_stack.pop()
+        self.status_cache = None
+        self.move_cache = None
+        (from_row, from_col), (to_row, to_col) = move.start, move.end
+
+        # Take the move's score change back out, with the tables in use now
+        rook, rook_from, rook_to = None, None, None
+        if castled_rook is not None:
+            rook = castled_rook[0]
+            rook_from, rook_to = from_row * COLS + castled_rook[1], rook.row * COLS + rook.col
+        score, material = self._score_change(
+            piece, from_row * COLS + from_col, to_row * COLS + to_col,
+            captured_piece, captured_square[0] * COLS + captured_square[1],
+            rook, rook_from, rook_to, promoted_piece)
+        self.eval_score -= score
+        self.material_score -= material
+
+        self.board[to_row][to_col] = 0
+        self.board[from_row][from_col] = piece
+        piece.row, piece.col = from_row, from_col
+        piece.has_moved = has_moved
+
+        if captured_piece is not None:
+            captured_piece.captured = False
+            self.board[captured_square[0]][captured_square[1]] = captured_piece
+
+        if castled_rook is not None:
+            rook, rook_col, rook_has_moved = castled_rook
+            self.board[rook.row][rook.col] = 0
+            self.board[from_row][rook_col] = rook
+            rook.col = rook_col
+            rook.has_moved = rook_has_moved
+
+        self.turn = piece.color
+        if self.turn == 'black':
+            self.fullmove_number -= 1
+        return move
+
+    def change_turn(self, captured_piece=None, moved_piece=None):
+        if moved_piece is None:
+            moved_piece = self.selected_piece
         self.turn = 'black' if self.turn == 'white' else 'white'
+        self.zobrist_key ^= ZOBRIST_BLACK_TO_MOVE
+        self.status_cache = None
+        self.move_cache = None
+        if self.turn == 'white':
+            self.fullmove_number += 1
         self.in_check[self.turn] = self.is_king_in_check(self.turn)
 
         # Update for threefold repetition
-        board_state = self.get_board_state()
-        self.board_state_counts[board_state] = self.board_state_counts.get(board_state, 0) + 1
+        self.board_state_counts[self.zobrist_key] = self.board_state_counts.get(self.zobrist_key, 0) + 1
 
         # Update halfmove clock for 50-move rule
-        if isinstance(self.selected_piece, Pawn) or captured_piece is not None:
+        if isinstance(moved_piece, Pawn) or captured_piece is not None:
             self.halfmove_clock = 0
         else:
             self.halfmove_clock += 1
 
+    def legal_move_map(self):
+        """
+        Return the legal destinations of every piece of the side to move.
+
+        The map is computed once per position and cached until the next move
+        is made or taken back. Promotions appear once per destination.
+
+        Returns:
+            dict: {(row, col) of a piece: [(row, col) destinations]}, only
+            for pieces that can move.
+        """
+        if self.move_cache is None:
+            move_map = {}
+            for move in self.legal_moves():
+                destinations = move_map.setdefault(move.start, [])
+                if move.end not in destinations:
+                    destinations.append(move.end)
+            self.move_cache = move_map
+        return self.move_cache
+
+    def has_legal_moves(self):
+        """True if the side to move has at least one legal move. Stops at the first one found."""
+        if self.move_cache is not None:
+            return bool(self.move_cache)
+        return next(self.legal_moves(), None) is not None
+
+    def game_status(self):
+        """
+        Work out whether the game is over in the current position.
+
+        The result is computed at most once per position and cached until the
+        next move is made or taken back. Legal moves are only generated until
+        the first one is found.
+
+        Returns:
+            GameStatus: (status, winner). Checkmate and stalemate take priority
+            over threefold repetition and the fifty-move rule.
+        """
+        if self.status_cache is None:
+            opponent = 'black' if self.turn == 'white' else 'white'
+            if not self.has_legal_moves():
+                if self.in_check[self.turn]:
+                    self.status_cache = GameStatus('checkmate', opponent)
+                else:
+                    self.status_cache = GameStatus('stalemate', 'draw')
+            elif self.is_threefold_repetition():
+                self.status_cache = GameStatus('threefold_repetition', 'draw')
+            elif self.is_fifty_move_rule():
+                self.status_cache = GameStatus('fifty_move_rule', 'draw')
+            else:
+                self.status_cache = GameStatus('ongoing', None)
+        return self.status_cache
+
+    def game_over_message(self):
+        """Return a message describing how the game ended, or None if it hasn't."""
+        status = self.game_status().status
+        if status == 'checkmate':
+            return f"{self.turn.capitalize()} is checkmated! {'Black' if self.turn == 'white' else 'White'} wins!"
+        elif status == 'stalemate':
+            return "Stalemate! It's a draw!"
+        elif status == 'threefold_repetition':
+            return "Threefold Repetition! It's a draw!"
+        elif status == 'fifty_move_rule':
+            return "50-Move Rule! It's a draw!"
+        return None
+
     def is_checkmate(self):
-        if not self.in_check[self.turn]:
-            return False
-        # No legal moves for the king means checkmate
-        for row in range(ROWS):
-            for col in range(COLS):
-                piece = self.board[row][col]
-                if piece != 0 and piece.color == self.turn:
-                    if len(piece.get_valid_moves(self)) > 0:
-                        return False
-        return True
+        return self.game_status().status == 'checkmate'
 
     def is_threefold_repetition(self):
-        return self.board_state_counts.get(self.get_board_state(), 0) >= 3
+        return self.board_state_counts.get(self.zobrist_key, 0) >= 3
 
     def is_fifty_move_rule(self):
         return self.halfmove_clock >= 50
 
     def is_stalemate(self):
-        if self.in_check[self.turn]:
-            return False
-        # No legal moves means stalemate
-        for row in range(ROWS):
-            for col in range(COLS):
-                piece = self.board[row][col]
-                if piece != 0 and piece.color == self.turn:
-                    if len(piece.get_valid_moves(self)) > 0:
-                        return False
-        return True
+        return self.game_status().status == 'stalemate'
 
     def get_board_state(self):
         state = ''
@@ -0,0 +1,261 @@
+"""
+Pygame rendering for chess_rules.Board.
+
+chess_rules itself never imports pygame; it loads this module only when a
+Board is created with use_pygame_ui=True, so headless bots and tournament
+workers don't pay for pygame at all.
+
+Piece sprites are loaded and scaled once per process and shared by every
+Board and window. BoardRenderer redraws only the squares that changed since
+the last frame and returns their rects for pygame.display.update.
+PositionWorker works out legal moves and the game status on a background
+thread, so the event loop never waits for the rules engine.
+"""
+
+import queue
+import threading
+
+import pygame
+from chess_rules import ROWS, COLS, WIDTH, HEIGHT, SQUARE_SIZE, WHITE, BROWN, BLUE
+
+PIECE_NAMES = [
+    'white_pawn', 'white_rook', 'white_knight', 'white_bishop', 'white_queen', 'white_king',
+    'black_pawn', 'black_rook', 'black_knight', 'black_bishop', 'black_queen', 'black_king'
+]
+
+# Scaled sprites by square size, shared by the whole process
+_sprite_cache = {}
+
+# Posted by PositionWorker when a position has been analyzed
+POSITION_READY = pygame.event.custom_type()
+
+# Bumped whenever something is drawn over the whole window, so renderers know
+# their squares are no longer on screen
+_overlays = 0
+
+
+def create_window(caption='Chess'):
+    """Initialize Pygame and open the game window."""
+    pygame.init()
+    win = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption(caption)
+    return win
+
+
+def load_images(size=SQUARE_SIZE):
+    """
+    Return the piece images scaled to size x size.
+
+    The PNGs are loaded and scaled the first time a size is asked for; later
+    calls (a new Board, a re-initialized window) get the cached sprites. The
+    returned dict is shared, so don't modify it.
+    """
+    images = _sprite_cache.get(size)
+    if images is None:
+        images = {}
+        for piece in PIECE_NAMES:
+            image = pygame.image.load(f'images/{piece}.png')
+            if pygame.display.get_surface() is not None:
+                image = image.convert_alpha()  # Match the display format so blits are fast
+            images[piece] = pygame.transform.scale(image, (size, size))
+        _sprite_cache[size] = images
+    return images
+
+
+def invalidate_window():
+    """Note that the whole window was drawn over, so every renderer repaints fully."""
+    global _overlays
+    _overlays += 1
+
+
+class BoardRenderer:
+    """
+    Draws a Board, repainting only squares whose contents changed.
+
+    Each square's piece, selection and move-dot state is remembered between
+    frames; render() repaints the squares whose state differs and returns
+    their rects.
+    """
+
+    def __init__(self, images=None, square_size=SQUARE_SIZE):
+        self.square_size = square_size
+        self.images = images or load_images(square_size)
+        self.drawn = [None] * (ROWS * COLS)
+        self.overlays = _overlays
+
+    def invalidate(self):
+        """Repaint every square on the next render()."""
+        self.drawn = [None] * (ROWS * COLS)
+
+    def render(self, board, win):
+        """
+        Bring the window up to date with the board.
+
+        Returns:
+            list: The pygame.Rects that were repainted.
+        """
+        if self.overlays != _overlays:
+            self.overlays = _overlays
+            self.invalidate()
+
+        selected = board.selected_piece
+        selected_square = (selected.row, selected.col) if selected else None
+        targets = set(board.valid_moves) if selected else ()
+        size = self.square_size
+        drawn = self.drawn
+        dirty = []
+        for row in range(ROWS):
+            for col in range(COLS):
+                piece = board.board[row][col]
+                state = (piece.name if piece != 0 else None, (row, col) == selected_square, (row, col) in targets)
+                index = row * COLS + col
+                if drawn[index] == state:
+                    continue
+                drawn[index] = state
+                rect = pygame.Rect(col * size, row * size, size, size)
+                win.fill(WHITE if (row + col) % 2 == 0 else BROWN, rect)
+                if state[0]:
+                    win.blit(self.images[state[0]], rect)
+                if state[1]:
+                    pygame.draw.rect(win, BLUE, rect, 3)
+                if state[2]:
+                    pygame.draw.circle(win, BLUE, rect.center, 10)
+                dirty.append(rect)
+        return dirty
+
+
+def draw_board(board, win):
+    """Draw all pieces and highlight the selected piece and its valid moves."""
+    # Draw each piece at the correct location
+    for row in range(ROWS):
+        for col in range(COLS):
+            piece = board.board[row][col]
+            if piece != 0:
+                win.blit(board.images[piece.name], (col * SQUARE_SIZE, row * SQUARE_SIZE))
+
+    # Highlight selected piece and valid moves
+    if board.selected_piece:
+        # Draw a rectangle around the selected piece
+        pygame.draw.rect(win, BLUE,
+                         (board.selected_piece.col * SQUARE_SIZE,
+                          board.selected_piece.row * SQUARE_SIZE,
+                          SQUARE_SIZE, SQUARE_SIZE), 3)
+
+        # Draw circles on valid move squares
+        for move in board.valid_moves:
+            row, col = move
+            pygame.draw.circle(win, BLUE,
+                               (col * SQUARE_SIZE + SQUARE_SIZE // 2,
+                                row * SQUARE_SIZE + SQUARE_SIZE // 2), 10)
+
+
+class PositionWorker:
+    """
+    Computes each position's legal moves and game status on a worker thread.
+
+    Call submit(board) whenever the position changes. The worker analyzes a
+    copy and posts a POSITION_READY event; pass that event to apply() on the
+    main thread to fill the board's caches, after which select_piece and
+    game_status answer instantly. Results for positions that have since
+    changed are dropped.
+    """
+
+    def __init__(self):
+        self.requests = queue.Queue()
+        self.thread = threading.Thread(target=self._run, name='position-worker', daemon=True)
+        self.thread.start()
+
+    @staticmethod
+    def position_token(board):
+        return board.zobrist_key, len(board.undo_stack)
+
+    def submit(self, board):
+        """Queue the board's current position for analysis."""
+        self.requests.put((self.position_token(board), board.copy()))
+
+    def ready(self, board):
+        """True if the board's legal moves and status are already known."""
+        return board.move_cache is not None and board.status_cache is not None
+
+    def apply(self, board, event):
+        """
+        Install a POSITION_READY result into the board if it is still current.
+
+        Returns:
+            bool: True if the result was for the board's current position.
+        """
+        if event.token != self.position_token(board):
+            return False
+        board.move_cache = event.moves
+        board.status_cache = event.status
+        return True
+
+    def _run(self):
+        while True:
+            token, board = self.requests.get()
+            # Only the newest position matters if several are waiting
+            while not self.requests.empty():
+                token, board = self.requests.get_nowait()
+            moves = board.legal_move_map()
+            status = board.game_status()
+            pygame.event.post(pygame.event.Event(POSITION_READY, token=token, moves=moves, status=status))
+
+
+def display_game_over(win, message):
+    """
+    Draw a game over banner across the middle of the window.
+
+    Returns:
+        pygame.Rect: The area drawn over.
+    """
+    font = pygame.font.Font(None, 36)
+    text = font.render(message, True, (0, 0, 0))
+    banner = pygame.Rect(0, HEIGHT // 2 - text.get_height(), WIDTH, text.get_height() * 2)
+    pygame.draw.rect(win, WHITE, banner)
+    win.blit(text, (WIDTH // 2 - text.get_width() // 2, HEIGHT // 2 - text.get_height() // 2))
+    return banner
+
+
+def choose_promotion_piece(board, color):
+    """Show the promotion options and block until the player clicks one."""
+    piece_options = ['queen', 'rook', 'bishop', 'knight']
+    piece_images = {
+        'queen': board.images[f"{color}_queen"],
+        'rook': board.images[f"{color}_rook"],
+        'bishop': board.images[f"{color}_bishop"],
+        'knight': board.images[f"{color}_knight"]
+    }
+    win = board.win
+
+    # Display options for promotion
+    invalidate_window()
+    win.fill(WHITE)
+    prompt_font = pygame.font.Font(None, 36)
+    prompt_text = prompt_font.render("Choose a piece for promotion:", True, (0, 0, 0))
+    win.blit(prompt_text, (WIDTH // 2 - prompt_text.get_width() // 2, HEIGHT // 4))
+
+    # Calculate even spacing and place each piece centered
+    option_width = SQUARE_SIZE
+    total_width = len(piece_options) * option_width + (len(piece_options) - 1) * 10
+    start_x = (WIDTH - total_width) // 2
+
+    for i, piece in enumerate(piece_options):
+        x = start_x + i * (option_width + 10)
+        y = HEIGHT // 2
+        win.blit(piece_images[piece], (x, y))
+        pygame.draw.rect(win, (0, 0, 0), (x, y, option_width, option_width), 2)
+
+    pygame.display.flip()
+
+    # Wait for user to select a piece
+    while True:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                pygame.quit()
+                exit()
+            elif event.type == pygame.MOUSEBUTTONDOWN:
+                x, y = event.pos
+                for i, piece in enumerate(piece_options):
+                    px = start_x + i * (option_width + 10)
+                    if px <= x <= px + option_width and y >= HEIGHT // 2:
+                        return piece
@@ -0,0 +1,175 @@
+"""
+NumPy feature planes for machine-learning bots.
+
+encode_batch turns any number of chess_rules.Board or bitboard.BitBoard
+positions into one float array of shape (N, NUM_PLANES, 8, 8). Planes are
+laid out like Board.board, so plane[row][col] with row 0 on the 8th rank:
+
+    0-5    white pawn, knight, bishop, rook, queen, king
+    6-11   black pawn, knight, bishop, rook, queen, king
+    12     side to move (all ones when white is to move)
+    13-16  castling rights: white kingside, white queenside,
+           black kingside, black queenside (all ones when available)
+    17     en passant target square
+
+The output is allocated once per batch (or passed in with out= and reused)
+and filled with vectorized index writes. The only per-position Python work
+is reading the 64 squares; BitBoards skip even that and are unpacked from
+their bitboards directly.
+
+Legal move masks, if requested, have shape (N, 4096) with True at
+from_square * 64 + to_square, squares numbered row * 8 + col.
+"""
+
+import numpy as np
+
+from chess_rules import ROWS, COLS
+from bitboard import BitBoard, WHITE_SIDE, move_from, move_to
+
+NUM_PIECE_PLANES = 12
+SIDE_TO_MOVE_PLANE = 12
+CASTLING_PLANES = 13
+EN_PASSANT_PLANE = 17
+NUM_PLANES = 18
+NUM_SQUARES = ROWS * COLS
+NUM_MOVES = NUM_SQUARES * NUM_SQUARES
+
+# Code for an empty square in the per-square piece codes
+NO_PIECE = NUM_PIECE_PLANES
+
+CASTLING_FLAGS = (('white', 'kingside'), ('white', 'queenside'), ('black', 'kingside'), ('black', 'queenside'))
+
+
+def move_index(move):
+    """Return the legal-mask index of a chess_rules Move or (start, end) pair."""
+    (from_row, from_col), (to_row, to_col) = move[0], move[1]
+    return (from_row * COLS + from_col) * NUM_SQUARES + to_row * COLS + to_col
+
+
+def _board_codes(board):
+    """Piece plane index for each of the 64 squares, NO_PIECE if empty."""
+    return [NO_PIECE if piece == 0 else piece.kind + (0 if piece.is_white else 6)
+            for row in board.board for piece in row]
+
+
+def _board_state(board):
+    castling = [board.castle_rights[color][side] for color, side in CASTLING_FLAGS]
+    target = board.en_passant_target
+    en_passant = -1 if target is None else target[0] * COLS + target[1]
+    return board.turn == 'white', castling, en_passant
+
+
+def _bitboard_state(position):
+    castling = [bool(position.castling & bit) for bit in (1, 2, 4, 8)]
+    return position.side == WHITE_SIDE, castling, position.ep_square
+
+
+def _fill_piece_planes(squares, boards):
+    """Write the piece planes of chess_rules Boards into squares (N, 12, 64)."""
+    # Shape it explicitly so an empty batch is still 2-D for np.nonzero
+    codes = np.array([_board_codes(board) for board in boards], dtype=np.int8).reshape(len(boards), NUM_SQUARES)
+    batch, square = np.nonzero(codes != NO_PIECE)
+    squares[batch, codes[batch, square], square] = 1
+
+
+def _fill_bitboard_planes(squares, positions):
+    """Write the piece planes of BitBoards into squares (N, 12, 64)."""
+    bitboards = np.array([position.pieces[0] + position.pieces[1] for position in positions], dtype=np.uint64)
+    # Little-endian bytes unpacked little-endian give bit i at index i, which is square i
+    bits = np.unpackbits(bitboards.astype('<u8').view(np.uint8), bitorder='little')
+    squares[:] = bits.reshape(len(positions), NUM_PIECE_PLANES, NUM_SQUARES)
+
+
+def encode_batch(boards, legal_masks=False, dtype=np.float32, out=None):
+    """
+    Encode a batch of positions into feature planes.
+
+    Parameters:
+        boards: A sequence of chess_rules.Board or bitboard.BitBoard positions
+            (they may be mixed).
+        legal_masks (bool): Also return the legal move masks.
+        dtype: NumPy dtype of the planes.
+        out (np.ndarray, optional): An array of shape (N, NUM_PLANES, 8, 8) to
+            fill instead of allocating a new one, e.g. to reuse a buffer
+            across batches.
+
+    Returns:
+        np.ndarray: The planes, shape (N, NUM_PLANES, 8, 8), or a tuple
+        (planes, masks) with masks of shape (N, 4096) and dtype bool if
+        legal_masks is True.
+    """
+    count = len(boards)
+    if out is None:
+        planes = np.zeros((count, NUM_PLANES, ROWS, COLS), dtype=dtype)
+    else:
+        if out.shape != (count, NUM_PLANES, ROWS, COLS):
+            raise ValueError(f"out has shape {out.shape}, expected {(count, NUM_PLANES, ROWS, COLS)}")
+        planes = out
+        planes.fill(0)
+    squares = planes.reshape(count, NUM_PLANES, NUM_SQUARES)
+
+    is_bitboard = np.array([isinstance(board, BitBoard) for board in boards], dtype=bool)
+    board_rows = np.nonzero(~is_bitboard)[0]
+    bitboard_rows = np.nonzero(is_bitboard)[0]
+    if len(board_rows) == count:
+        _fill_piece_planes(squares[:, :NUM_PIECE_PLANES], boards)
+    else:
+        if len(board_rows):
+            piece_planes = np.zeros((len(board_rows), NUM_PIECE_PLANES, NUM_SQUARES), dtype=dtype)
+            _fill_piece_planes(piece_planes, [boards[i] for i in board_rows])
+            squares[board_rows, :NUM_PIECE_PLANES] = piece_planes
+        piece_planes = np.empty((len(bitboard_rows), NUM_PIECE_PLANES, NUM_SQUARES), dtype=dtype)
+        _fill_bitboard_planes(piece_planes, [boards[i] for i in bitboard_rows])
+        squares[bitboard_rows, :NUM_PIECE_PLANES] = piece_planes
+
+    states = [_bitboard_state(board) if bitboard else _board_state(board)
+              for board, bitboard in zip(boards, is_bitboard)]
+    white_to_move = np.array([state[0] for state in states], dtype=bool).reshape(count)
+    castling = np.array([state[1] for state in states], dtype=bool).reshape(count, 4)
+    en_passant = np.array([state[2] for state in states], dtype=np.int16).reshape(count)
+
+    planes[:, SIDE_TO_MOVE_PLANE] = white_to_move[:, None, None]
+    planes[:, CASTLING_PLANES:CASTLING_PLANES + 4] = castling[:, :, None, None]
+    batch = np.nonzero(en_passant >= 0)[0]
+    squares[batch, EN_PASSANT_PLANE, en_passant[batch]] = 1
+
+    if not legal_masks:
+        return planes
+    return planes, encode_legal_masks(boards)
+
+
+def encode_legal_masks(boards):
+    """
+    Return the legal move masks of a batch of positions.
+
+    Promotions to different pieces share one from/to entry.
+
+    Returns:
+        np.ndarray: Shape (N, 4096), dtype bool.
+    """
+    masks = np.zeros((len(boards), NUM_MOVES), dtype=bool)
+    batch = []
+    indices = []
+    for i, board in enumerate(boards):
+        if isinstance(board, BitBoard):
+            moves = [move_from(move) * NUM_SQUARES + move_to(move) for move in board.legal_moves()]
+        else:
+            moves = [move_index(move) for move in board.legal_moves()]
+        batch.extend([i] * len(moves))
+        indices.extend(moves)
+    masks[np.array(batch, dtype=np.intp), np.array(indices, dtype=np.intp)] = True
+    return masks
+
+
+def encode_board(board, legal_mask=False, dtype=np.float32):
+    """
+    Encode a single position.
+
+    Returns:
+        np.ndarray: Shape (NUM_PLANES, 8, 8), or (planes, mask) with a mask of
+        shape (4096,) if legal_mask is True.
+    """
+    result = encode_batch([board], legal_masks=legal_mask, dtype=dtype)
+    if legal_mask:
+        return result[0][0], result[1][0]
+    return result[0]
@@ -0,0 +1,420 @@
+"""
+Run choose_move agents as separate processes, speaking a UCI-style protocol.
+
+Engine side: any agent class with the choose_move(board) interface can be
+served over stdin/stdout:
+
+    python engine_protocol.py search_agent:SearchAgent
+    python engine_protocol.py chess_bot_tester:RandomAgent
+
+Supported commands (a subset of UCI, moves in long algebraic notation):
+
+    uci / isready / ucinewgame / quit
+    position startpos [moves e2e4 e7e5 ...]
+    position fen <fen> [moves ...]
+    go [wtime <ms>] [btime <ms>] [winc <ms>] [binc <ms>] [movetime <ms>] [infinite] [ponder]
+    stop / ponderhit
+
+The engine answers 'bestmove <move> [ponder <move>]', or 'bestmove 0000' if
+there is no move or the agent raised ('info string error ...' comes first). Malformed values, bad FENs and illegal moves are reported
+as 'info string' lines and skipped; a position stops at its first bad move.
+Agents can optionally provide set_clock(remaining, increment), a time_limit
+attribute, stop(), set_deadline(seconds) and expected_reply(board, move); the
+engine uses whichever exist.
+
+Tester side: EngineAgent starts an engine process and plays through it with
+the same choose_move(board) interface, so the referee and tournaments can
+use it like any in-process agent. If the engine crashes, hangs or leaks, only
+its own process is affected.
+"""
+
+import importlib
+import os
+import queue
+import shlex
+import subprocess
+import sys
+import threading
+
+from chess_rules import Board
+from notation import move_to_uci, parse_uci
+
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+# time_limit used while pondering or on 'go infinite'; the search ends on stop or ponderhit
+UNLIMITED_TIME = 1e9
+
+
+def load_agent_class(spec):
+    """Return the class named by 'module:Class', e.g. 'search_agent:SearchAgent'."""
+    module_name, _, class_name = spec.partition(':')
+    if not class_name:
+        raise ValueError(f"Agent must be given as module:Class, not {spec!r}")
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def agent_move(board, piece, dest):
+    """Return the legal Move for an agent's (piece, destination) answer, or None."""
+    if piece is None or dest is None:
+        return None
+    for move in board.legal_moves():
+        if move.start == (piece.row, piece.col) and move.end == tuple(dest) and move.promotion in (None, 'queen'):
+            return move
+    return None
+
+
+class Engine:
+    """The engine side: reads commands from a stream and writes replies to another."""
+
+    def __init__(self, agent_class, input_stream=sys.stdin, output_stream=sys.stdout):
+        self.agent_class = agent_class
+        self.input = input_stream
+        self.output = output_stream
+        self.agents = {}
+        self.board = Board()
+        self.position = (START_FEN, [])
+        self.search_thread = None
+        self.result = None
+        self.pondering = False
+        self.budget = None
+        self.lock = threading.Lock()
+
+    def send(self, line):
+        self.output.write(line + '\n')
+        self.output.flush()
+
+    def agent(self, color):
+        if color not in self.agents:
+            self.agents[color] = self.agent_class(color)
+        return self.agents[color]
+
+    def run(self):
+        """Serve commands until 'quit' or the end of the input."""
+        for line in self.input:
+            tokens = line.split()
+            if not tokens:
+                continue
+            command, args = tokens[0], tokens[1:]
+            if command == 'quit':
+                break
+            handler = getattr(self, f"cmd_{command}", None)
+            if handler is not None:
+                handler(args)
+        self.cmd_stop([])
+
+    def cmd_uci(self, args):
+        self.send(f"id name {self.agent_class.__name__}")
+        self.send("uciok")
+
+    def cmd_isready(self, args):
+        self.finish_search()
+        self.send("readyok")
+
+    def cmd_ucinewgame(self, args):
+        self.finish_search()
+        self.agents = {}
+        self.board = Board()
+        self.position = (START_FEN, [])
+
+    def cmd_position(self, args):
+        """Set up a position, applying only the new moves if it extends the current one."""
+        self.finish_search()
+        if 'moves' in args:
+            split = args.index('moves')
+            setup, moves = args[:split], args[split + 1:]
+        else:
+            setup, moves = args, []
+        if setup and setup[0] == 'fen':
+            fen = ' '.join(setup[1:])
+        else:
+            fen = START_FEN
+
+        old_fen, old_moves = self.position
+        if fen == old_fen and moves[:len(old_moves)] == old_moves:
+            new_moves = moves[len(old_moves):]
+        else:
+            try:
+                self.board = Board.from_fen(fen)
+            except ValueError as error:
+                self.send(f"info string {error}")
+                return
+            old_moves = []
+            new_moves = moves
+        # Stop at the first bad move, leaving the position before it
+        applied = list(old_moves)
+        for text in new_moves:
+            try:
+                move = parse_uci(text)
+            except ValueError as error:
+                self.send(f"info string {error}")
+                break
+            if move not in self.board.legal_moves():
+                self.send(f"info string Illegal move: {text}")
+                break
+            self.board.make_move(move)
+            applied.append(text)
+        self.position = (fen, applied)
+
+    def cmd_go(self, args):
+        self.finish_search()
+        options = {}
+        flags = set()
+        i = 0
+        while i < len(args):
+            if args[i] in ('wtime', 'btime', 'winc', 'binc', 'movetime') and i + 1 < len(args):
+                try:
+                    options[args[i]] = max(0.0, float(args[i + 1]) / 1000)
+                except ValueError:
+                    self.send(f"info string Ignoring {args[i]} {args[i + 1]}: not a number")
+                i += 2
+            else:
+                flags.add(args[i])
+                i += 1
+
+        color = self.board.turn
+        agent = self.agent(color)
+        prefix = 'w' if color == 'white' else 'b'
+        if f'{prefix}time' in options and hasattr(agent, 'set_clock'):
+            agent.set_clock(options[f'{prefix}time'], options.get(f'{prefix}inc', 0.0))
+        if 'movetime' in options and hasattr(agent, 'time_limit'):
+            agent.time_limit = options['movetime']
+        self.budget = getattr(agent, 'time_limit', None)
+        self.pondering = 'ponder' in flags or 'infinite' in flags
+        if self.pondering and hasattr(agent, 'time_limit'):
+            agent.time_limit = UNLIMITED_TIME
+
+        self.result = None
+        board = self.board.copy()
+        self.search_thread = threading.Thread(target=self.search, args=(agent, board), daemon=True)
+        self.search_thread.start()
+
+    def search(self, agent, board):
+        move = reply = None
+        try:
+            piece, dest = agent.choose_move(board)
+            move = agent_move(board, piece, dest)
+            if move is not None and hasattr(agent, 'expected_reply'):
+                reply = agent.expected_reply(board, move)
+        except Exception as error:
+            # Still answer, so the tester scores an error instead of waiting for a move
+            self.send(f"info string error {type(error).__name__}: {error}")
+            move = reply = None
+        finally:
+            if self.budget is not None:
+                # Undo the unlimited time a ponder or infinite search was given
+                agent.time_limit = self.budget
+        with self.lock:
+            self.result = (move, reply)
+            if not self.pondering:
+                self.report()
+
+    def report(self):
+        """Send the bestmove line once. Call with self.lock held."""
+        if self.result is None or self.search_thread is None:
+            return
+        move, reply = self.result
+        line = f"bestmove {move_to_uci(move) if move else '0000'}"
+        if reply is not None:
+            line += f" ponder {move_to_uci(reply)}"
+        self.send(line)
+        self.search_thread = None
+
+    def cmd_ponderhit(self, args):
+        """The predicted move was played: carry on as a normal timed search."""
+        with self.lock:
+            self.pondering = False
+            agent = self.agents.get(self.board.turn)
+            if self.result is not None:
+                self.report()
+            elif agent is not None and hasattr(agent, 'set_deadline') and self.budget is not None:
+                agent.set_deadline(self.budget)
+
+    def cmd_stop(self, args):
+        """End the current search now and report its best move."""
+        with self.lock:
+            self.pondering = False
+            thread = self.search_thread
+        if thread is None:
+            return
+        agent = self.agents.get(self.board.turn)
+        while thread.is_alive():
+            # Keep asking: the search may not have started its clock yet
+            if agent is not None and hasattr(agent, 'stop'):
+                agent.stop()
+            thread.join(0.05)
+        with self.lock:
+            self.report()
+
+    def finish_search(self):
+        if self.search_thread is not None:
+            self.cmd_stop([])
+
+
+class EngineAgent:
+    """
+    An agent played by an engine subprocess.
+
+    The process is started when the agent is created and stopped by close().
+    Moves are sent as 'position ... moves ...' plus 'go' with the clock times
+    the referee passed to set_clock. With ponder=True the engine keeps
+    thinking on its predicted reply during the opponent's turn.
+    """
+
+    def __init__(self, color, command, ponder=False, movetime=None, timeout=60.0):
+        """
+        Args:
+            color (str): 'white' or 'black'.
+            command (list or str): The engine command line.
+            ponder (bool): Let the engine think on the opponent's time.
+            movetime (float): Seconds per move to ask for when the game is untimed.
+            timeout (float): Seconds to wait for a move when the game is untimed.
+        """
+        self.color = color
+        self.command = shlex.split(command) if isinstance(command, str) else list(command)
+        self.ponder = ponder
+        self.movetime = movetime
+        self.timeout = timeout
+        self.clock = None
+        self.increment = 0.0
+        self.ponder_moves = None
+        self.error = None
+        self.process = subprocess.Popen(self.command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                        text=True, bufsize=1)
+        self.lines = queue.Queue()
+        threading.Thread(target=self._read, daemon=True).start()
+        try:
+            for command, reply in (('uci', 'uciok'), ('isready', 'readyok')):
+                self._send(command)
+                if self._wait_for(reply, self.timeout) is None:
+                    raise RuntimeError(f"Engine did not answer {command!r}: {' '.join(self.command)}")
+        except (OSError, RuntimeError):
+            self.process.kill()
+            raise
+
+    def _read(self):
+        for line in self.process.stdout:
+            self.lines.put(line.strip())
+        self.lines.put(None)
+
+    def _send(self, line):
+        self.process.stdin.write(line + '\n')
+        self.process.stdin.flush()
+
+    def _wait_for(self, prefix, timeout):
+        """Return the first line starting with prefix, or None on timeout."""
+        while True:
+            try:
+                line = self.lines.get(timeout=timeout)
+            except queue.Empty:
+                return None
+            if line is None:
+                raise RuntimeError(f"Engine exited: {' '.join(self.command)}")
+            if line.startswith('info string error '):
+                self.error = line[len('info string error '):]
+            if line.startswith(prefix):
+                return line
+
+    def set_clock(self, remaining, increment):
+        self.clock = remaining
+        self.increment = increment
+
+    def _position_command(self, board, extra_moves=()):
+        # Boards played from the start position send their move list, so the
+        # engine sees the game history; others are sent as FEN
+        plies = (board.fullmove_number - 1) * 2 + (board.turn == 'black')
+        moves = [move_to_uci(entry[0]) for entry in board.undo_stack] + list(extra_moves)
+        if len(board.undo_stack) == plies and plies > 0:
+            return ' '.join(['position startpos moves'] + moves)
+        fen = board.get_fen()
+        if fen == START_FEN and not extra_moves:
+            return 'position startpos'
+        return ' '.join([f'position fen {fen}'] + (['moves'] + list(extra_moves) if extra_moves else []))
+
+    def _go_command(self, ponder=False):
+        if self.clock is None:
+            command = f"go movetime {int(self.movetime * 1000)}" if self.movetime else 'go'
+        else:
+            # Only our own clock is known; give the opponent the same time
+            ms, inc = int(self.clock * 1000), int(self.increment * 1000)
+            command = f"go wtime {ms} btime {ms} winc {inc} binc {inc}"
+        return command + ' ponder' if ponder else command
+
+    def choose_move(self, board):
+        timeout = self.clock + 1.0 if self.clock is not None else self.timeout
+        last_move = move_to_uci(board.undo_stack[-1][0]) if board.undo_stack else None
+
+        if self.ponder_moves is not None:
+            predicted = self.ponder_moves
+            self.ponder_moves = None
+            if last_move == predicted:
+                self._send('ponderhit')
+            else:
+                # Wrong guess: throw the ponder search away
+                self._send('stop')
+                self._wait_for('bestmove', timeout)
+                self.error = None
+                self._send(self._position_command(board))
+                self._send(self._go_command())
+        else:
+            self._send(self._position_command(board))
+            self._send(self._go_command())
+
+        line = self._wait_for('bestmove', timeout)
+        if line is None:
+            # Out of time: make the engine answer so the pipe stays in step
+            self._send('stop')
+            self._wait_for('bestmove', 5.0)
+            self.error = None
+            return None, None
+        tokens = line.split()
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise RuntimeError(f"Engine agent failed: {error}")
+        if len(tokens) < 2 or tokens[1] == '0000':
+            return None, None
+        move = parse_uci(tokens[1])
+
+        if self.ponder and len(tokens) >= 4 and tokens[2] == 'ponder':
+            self.ponder_moves = tokens[3]
+            self._send(self._position_command(board, [tokens[1], tokens[3]]))
+            self._send(self._go_command(ponder=True))
+
+        piece = board.board[move.start[0]][move.start[1]]
+        return (piece, move.end) if piece != 0 else (None, None)
+
+    def close(self):
+        """Stop the engine process."""
+        if self.process.poll() is None:
+            try:
+                self._send('stop')
+                self._send('quit')
+                self.process.wait(timeout=2)
+            except (OSError, subprocess.TimeoutExpired):
+                self.process.kill()
+
+
+class EngineAgentFactory:
+    """
+    A picklable stand-in for an agent class that builds EngineAgents.
+
+    Pass it to run_tournament like an agent class, so each worker process
+    starts its own engine subprocesses.
+    """
+
+    def __init__(self, command, name=None, **options):
+        self.command = shlex.split(command) if isinstance(command, str) else list(command)
+        self.__name__ = name or self.command[-1].rpartition(':')[2]
+        self.options = options
+
+    def __call__(self, color):
+        return EngineAgent(color, self.command, **self.options)
+
+
+def main():
+    if len(sys.argv) != 2:
+        raise SystemExit(f"usage: {os.path.basename(sys.argv[0])} module:AgentClass")
+    Engine(load_agent_class(sys.argv[1])).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+"""
+Compact binary archive of played games.
+
+An archive is two append-only files:
+
+    games.chga      8-byte magic, then one record per game
+    games.chga.idx  8-byte magic, then the offset of each record as a
+                    little-endian uint64
+
+A record is a fixed header (move count, result, termination, flags, seed and
+the lengths of the two player names), the UTF-8 player names and then one
+16-bit little-endian word per move:
+
+    bits 0-5    from square (row * 8 + col)
+    bits 6-11   to square
+    bits 12-14  promotion: 0 none, 1 knight, 2 bishop, 3 rook, 4 queen
+
+A game is written to the data file before its index entry, so the index
+never points at a partial record. Iterating reads the data file from start
+to end and stops at a truncated final record; random access reads one index
+entry and one record. Neither loads the whole archive. Reopening an archive
+for writing drops a truncated final record first, so later games stay
+readable.
+"""
+
+import os
+import struct
+import sys
+from array import array
+from collections import namedtuple
+
+from chess_rules import COLS, Move
+
+DATA_MAGIC = b'CHGA\x01\x00\x00\x00'
+INDEX_MAGIC = b'CHGI\x01\x00\x00\x00'
+MAGIC_SIZE = 8
+
+# move count, result, termination, flags, seed, white name length, black name length
+RECORD_HEADER = struct.Struct('<IBBBqBB')
+INDEX_ENTRY = struct.Struct('<Q')
+
+RESULTS = ('white', 'black', 'draw')
+TERMINATIONS = ('checkmate', 'stalemate', 'threefold_repetition', 'fifty_move_rule',
+                'timeout', 'illegal_move', 'no_move', 'error')
+PROMOTIONS = (None, 'knight', 'bishop', 'rook', 'queen')
+UNKNOWN = 255
+HAS_SEED = 1
+
+ArchivedGame = namedtuple('ArchivedGame', ['white', 'black', 'result', 'termination', 'seed', 'moves'])
+
+
+def encode_move(move):
+    """Pack a Move into a 16-bit int."""
+    (from_row, from_col), (to_row, to_col) = move[0], move[1]
+    promotion = move[2] if len(move) > 2 else None
+    return (from_row * COLS + from_col) | (to_row * COLS + to_col) << 6 | PROMOTIONS.index(promotion) << 12
+
+
+def decode_move(word):
+    """Unpack a 16-bit int into a Move."""
+    from_square = word & 63
+    to_square = (word >> 6) & 63
+    return Move(divmod(from_square, COLS), divmod(to_square, COLS), PROMOTIONS[word >> 12])
+
+
+def _index_path(path):
+    return path + '.idx'
+
+
+def _code(value, names):
+    return UNKNOWN if value is None else names.index(value)
+
+
+def _name(code, names):
+    return None if code == UNKNOWN else names[code]
+
+
+def _check_magic(stream, magic, path):
+    if stream.read(MAGIC_SIZE) != magic:
+        raise ValueError(f"Not a game archive: {path!r}")
+
+
+def _repair(data, index):
+    """
+    Cut an interrupted write off the end of an archive opened for appending.
+
+    Complete records after the last indexed one (written before their index
+    entry) are indexed; a truncated record at the end of the data file and a
+    partial index entry are removed, so new games follow the last good one.
+    """
+    count = (index.seek(0, os.SEEK_END) - MAGIC_SIZE) // INDEX_ENTRY.size
+    end = MAGIC_SIZE
+    while count:
+        index.seek(MAGIC_SIZE + (count - 1) * INDEX_ENTRY.size)
+        offset, = INDEX_ENTRY.unpack(index.read(INDEX_ENTRY.size))
+        data.seek(offset)
+        if _read_record(data) is not None:
+            end = data.tell()
+            break
+        count -= 1
+    index.truncate(MAGIC_SIZE + count * INDEX_ENTRY.size)
+
+    offsets = []
+    data.seek(end)
+    while _read_record(data) is not None:
+        offsets.append(end)
+        end = data.tell()
+    data.truncate(end)
+    index.seek(0, os.SEEK_END)
+    index.write(b''.join(INDEX_ENTRY.pack(offset) for offset in offsets))
+    data.flush()
+    index.flush()
+
+
+def _read_record(stream):
+    """Read the record at the stream position; None at the end or at a truncated record."""
+    header = stream.read(RECORD_HEADER.size)
+    if len(header) < RECORD_HEADER.size:
+        return None
+    move_count, result, termination, flags, seed, white_length, black_length = RECORD_HEADER.unpack(header)
+    names = stream.read(white_length + black_length)
+    data = stream.read(2 * move_count)
+    if len(names) < white_length + black_length or len(data) < 2 * move_count:
+        return None
+    words = array('H')
+    words.frombytes(data)
+    if sys.byteorder == 'big':
+        words.byteswap()
+    return ArchivedGame(
+        white=names[:white_length].decode('utf-8'),
+        black=names[white_length:].decode('utf-8'),
+        result=_name(result, RESULTS),
+        termination=_name(termination, TERMINATIONS),
+        seed=seed if flags & HAS_SEED else None,
+        moves=[decode_move(word) for word in words]
+    )
+
+
+class ArchiveWriter:
+    """
+    Appends games to an archive, creating it if needed.
+
+    Opening an existing archive first repairs the end of a write that was
+    interrupted, so the new games stay readable. Use it as a context manager,
+    or call close() when done.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.data = open(path, 'a+b')
+        self.index = open(_index_path(path), 'a+b')
+        for stream, magic in ((self.data, DATA_MAGIC), (self.index, INDEX_MAGIC)):
+            stream.seek(0)
+            if stream.read(1):
+                stream.seek(0)
+                _check_magic(stream, magic, path)
+            else:
+                stream.write(magic)
+        _repair(self.data, self.index)
+
+    def write_game(self, moves, white='', black='', result=None, termination=None, seed=None):
+        """
+        Append one game.
+
+        Parameters:
+            moves: The Moves played, in order.
+            white, black (str): Player names, at most 255 bytes of UTF-8 each.
+            result (str): 'white', 'black', 'draw' or None if unknown.
+            termination (str): How the game ended (see TERMINATIONS), or None.
+            seed (int): The game's random seed, or None.
+        """
+        white_name = white.encode('utf-8')
+        black_name = black.encode('utf-8')
+        if len(white_name) > 255 or len(black_name) > 255:
+            raise ValueError("Player names are limited to 255 bytes")
+        words = array('H', [encode_move(move) for move in moves])
+        if sys.byteorder == 'big':
+            words.byteswap()
+        header = RECORD_HEADER.pack(len(words), _code(result, RESULTS), _code(termination, TERMINATIONS),
+                                    HAS_SEED if seed is not None else 0, seed or 0,
+                                    len(white_name), len(black_name))
+
+        offset = self.data.seek(0, os.SEEK_END)
+        self.data.write(header + white_name + black_name + words.tobytes())
+        self.data.flush()
+        self.index.write(INDEX_ENTRY.pack(offset))
+        self.index.flush()
+
+    def write_result(self, game):
+        """Append a game dict as returned by chess_bot_tester.play_tournament_game."""
+        self.write_game(game['moves'], game['white'], game['black'],
+                        game['winner'], game.get('termination'), game.get('seed'))
+
+    def close(self):
+        self.data.close()
+        self.index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ArchiveReader:
+    """
+    Reads games from an archive.
+
+    Iterating streams every game in order; len() and indexing use the index
+    file to read single games.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.data = open(path, 'rb')
+        _check_magic(self.data, DATA_MAGIC, path)
+        self.index = open(_index_path(path), 'rb')
+        _check_magic(self.index, INDEX_MAGIC, path)
+
+    def __len__(self):
+        return (os.fstat(self.index.fileno()).st_size - MAGIC_SIZE) // INDEX_ENTRY.size
+
+    def __getitem__(self, number):
+        count = len(self)
+        if number < 0:
+            number += count
+        if not 0 <= number < count:
+            raise IndexError("game number out of range")
+        self.index.seek(MAGIC_SIZE + number * INDEX_ENTRY.size)
+        offset, = INDEX_ENTRY.unpack(self.index.read(INDEX_ENTRY.size))
+        self.data.seek(offset)
+        return _read_record(self.data)
+
+    def __iter__(self):
+        with open(self.path, 'rb') as stream:
+            stream.seek(MAGIC_SIZE)
+            while True:
+                game = _read_record(stream)
+                if game is None:
+                    return
+                yield game
+
+    def close(self):
+        self.data.close()
+        self.index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def rebuild_index(path):
+    """
+    Rewrite the index of an archive from its data file.
+
+    Use this if a writer was interrupted between writing a game and its index
+    entry. A truncated final record is left out of the index.
+
+    Returns:
+        int: The number of games indexed.
+    """
+    offsets = []
+    with open(path, 'rb') as stream:
+        _check_magic(stream, DATA_MAGIC, path)
+        while True:
+            offset = stream.tell()
+            if _read_record(stream) is None:
+                break
+            offsets.append(offset)
+    with open(_index_path(path), 'wb') as index:
+        index.write(INDEX_MAGIC)
+        index.write(b''.join(INDEX_ENTRY.pack(offset) for offset in offsets))
+    return len(offsets)
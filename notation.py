@@ -0,0 +1,321 @@
+"""
+SAN, UCI and PGN encoding and decoding for chess_rules boards.
+
+Parsing a SAN move only looks at the pieces that could reach the destination
+square (knight and king offsets, the sliding rays and the pawn squares behind
+it), rather than generating moves for every piece on the board. Encoding
+produces minimal standard SAN: disambiguation only when needed, 'x' for
+captures including en passant, '=Q' for promotions and '+' or '#' for check
+and mate.
+"""
+
+import re
+
+from chess_rules import (Board, ROWS, COLS, KNIGHT_OFFSETS, KING_OFFSETS, ROOK_DIRECTIONS, BISHOP_DIRECTIONS,
+                         PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING, Move)
+
+PIECE_LETTERS = {KNIGHT: 'N', BISHOP: 'B', ROOK: 'R', QUEEN: 'Q', KING: 'K'}
+LETTER_KINDS = {letter: kind for kind, letter in PIECE_LETTERS.items()}
+PROMOTION_LETTERS = {'queen': 'Q', 'rook': 'R', 'bishop': 'B', 'knight': 'N'}
+LETTER_PROMOTIONS = {letter: name for name, letter in PROMOTION_LETTERS.items()}
+
+SAN_PATTERN = re.compile(r'^([NBRQK])?([a-h])?([1-8])?(x)?([a-h][1-8])(?:=([NBRQnbrq])|([NBRQ]))?$')
+RESULTS = ('1-0', '0-1', '1/2-1/2', '*')
+
+
+def square_name(square):
+    """Return the algebraic name of a (row, col) square, e.g. (6, 4) -> 'e2'."""
+    row, col = square
+    return f"{chr(col + ord('a'))}{ROWS - row}"
+
+
+def parse_square(name):
+    """Return the (row, col) square for an algebraic name, e.g. 'e2' -> (6, 4)."""
+    if len(name) != 2 or name[0] not in 'abcdefgh' or name[1] not in '12345678':
+        raise ValueError(f"Invalid square: {name!r}")
+    return ROWS - int(name[1]), ord(name[0]) - ord('a')
+
+
+def move_to_uci(move):
+    """Return a Move in long algebraic (UCI) notation, e.g. 'e7e8q'."""
+    suffix = PROMOTION_LETTERS[move.promotion].lower() if move.promotion else ''
+    return square_name(move.start) + square_name(move.end) + suffix
+
+
+def parse_uci(text):
+    """Return the Move for a long algebraic (UCI) string such as 'e2e4' or 'e7e8q'."""
+    if len(text) not in (4, 5):
+        raise ValueError(f"Invalid UCI move: {text!r}")
+    promotion = None
+    if len(text) == 5:
+        promotion = LETTER_PROMOTIONS.get(text[4].upper())
+        if promotion is None:
+            raise ValueError(f"Invalid UCI move: {text!r}")
+    return Move(parse_square(text[0:2]), parse_square(text[2:4]), promotion)
+
+
+def _pieces_reaching(board, kind, color, dest):
+    """Pieces of one kind and color that could move to dest, ignoring pins."""
+    row, col = dest
+    pieces = []
+    if kind in (KNIGHT, KING):
+        for dr, dc in (KNIGHT_OFFSETS if kind == KNIGHT else KING_OFFSETS):
+            r, c = row + dr, col + dc
+            if 0 <= r < ROWS and 0 <= c < COLS:
+                piece = board.board[r][c]
+                if piece != 0 and piece.kind == kind and piece.color == color:
+                    pieces.append(piece)
+        return pieces
+
+    directions = []
+    if kind in (ROOK, QUEEN):
+        directions += ROOK_DIRECTIONS
+    if kind in (BISHOP, QUEEN):
+        directions += BISHOP_DIRECTIONS
+    for dr, dc in directions:
+        r, c = row + dr, col + dc
+        while 0 <= r < ROWS and 0 <= c < COLS:
+            piece = board.board[r][c]
+            if piece != 0:
+                if piece.kind == kind and piece.color == color:
+                    pieces.append(piece)
+                break
+            r += dr
+            c += dc
+    return pieces
+
+
+def _pawns_reaching(board, color, dest, capture):
+    """Pawns of one color that could move (or capture, incl. en passant) to dest."""
+    row, col = dest
+    direction = -1 if color == 'white' else 1
+    from_row = row - direction
+    if not 0 <= from_row < ROWS:
+        return []
+    target = board.board[row][col]
+    if capture:
+        if target == 0 and board.en_passant_target != dest:
+            return []
+        origins = [(from_row, c) for c in (col - 1, col + 1) if 0 <= c < COLS]
+    else:
+        if target != 0:
+            return []
+        origins = [(from_row, col)]
+        double_row = from_row - direction
+        if board.board[from_row][col] == 0 and double_row == (6 if color == 'white' else 1):
+            origins.append((double_row, col))
+    pawns = []
+    for r, c in origins:
+        piece = board.board[r][c]
+        if piece != 0 and piece.kind == PAWN and piece.color == color:
+            pawns.append(piece)
+    return pawns
+
+
+def _legal_candidates(board, kind, dest, capture):
+    color = board.turn
+    target = board.board[dest[0]][dest[1]]
+    if target != 0 and target.color == color:
+        return []
+    if kind == PAWN:
+        pieces = _pawns_reaching(board, color, dest, capture)
+    else:
+        pieces = _pieces_reaching(board, kind, color, dest)
+    return [piece for piece in pieces if not board.is_in_check_after_move(piece, dest)]
+
+
+def _castling_move(board, kingside):
+    color = board.turn
+    home = ROWS - 1 if color == 'white' else 0
+    king = board.board[home][4]
+    if king == 0 or king.kind != KING or king.color != color:
+        return None
+    dest = (home, 6 if kingside else 2)
+    if dest not in king.get_valid_moves(board, castle_rights=board.castle_rights):
+        return None
+    return Move((home, 4), dest)
+
+
+def parse_san(board, san):
+    """
+    Return the Move for a SAN string in the current position.
+
+    Fully specified moves such as 'Ng1f3' are accepted as well as minimal SAN,
+    and check, mate and annotation suffixes are ignored.
+
+    Raises:
+        ValueError: If the move is malformed, illegal or ambiguous.
+    """
+    text = san.strip().rstrip('+#!?').replace('e.p.', '').strip()
+    if text in ('O-O', '0-0', 'O-O-O', '0-0-0'):
+        move = _castling_move(board, kingside=len(text) == 3)
+        if move is None:
+            raise ValueError(f"Illegal move: {san!r}")
+        return move
+
+    match = SAN_PATTERN.match(text)
+    if not match:
+        raise ValueError(f"Invalid SAN move: {san!r}")
+    letter, from_file, from_rank, capture, dest_name, promotion_letter, bare_promotion = match.groups()
+    promotion_letter = (promotion_letter or bare_promotion or 'Q').upper()
+    kind = LETTER_KINDS[letter] if letter else PAWN
+    dest = parse_square(dest_name)
+    # Pawn captures always name their file; a different file also means a capture
+    if kind == PAWN and from_file and from_file != dest_name[0]:
+        capture = 'x'
+
+    candidates = _legal_candidates(board, kind, dest, bool(capture))
+    if from_file:
+        candidates = [piece for piece in candidates if piece.col == ord(from_file) - ord('a')]
+    if from_rank:
+        candidates = [piece for piece in candidates if piece.row == ROWS - int(from_rank)]
+    if not candidates:
+        raise ValueError(f"Illegal move: {san!r}")
+    if len(candidates) > 1:
+        raise ValueError(f"Ambiguous move: {san!r}")
+
+    piece = candidates[0]
+    promotion = None
+    if kind == PAWN and dest[0] in (0, ROWS - 1):
+        promotion = LETTER_PROMOTIONS[promotion_letter]
+    return Move((piece.row, piece.col), dest, promotion)
+
+
+def move_to_san(board, move):
+    """
+    Return the minimal SAN for a legal Move in the current position.
+
+    The move is played and taken back to decide the check or mate suffix.
+    """
+    (from_row, from_col), dest = move[0], move[1]
+    promotion = move[2] if len(move) > 2 else None
+    piece = board.board[from_row][from_col]
+    target = board.board[dest[0]][dest[1]]
+
+    if piece.kind == KING and abs(dest[1] - from_col) == 2:
+        san = 'O-O' if dest[1] > from_col else 'O-O-O'
+    elif piece.kind == PAWN:
+        is_capture = dest[1] != from_col
+        san = f"{chr(from_col + ord('a'))}x" if is_capture else ''
+        san += square_name(dest)
+        if dest[0] in (0, ROWS - 1):
+            promotion = promotion or 'queen'
+            san += '=' + PROMOTION_LETTERS[promotion]
+    else:
+        san = PIECE_LETTERS[piece.kind]
+        others = [other for other in _legal_candidates(board, piece.kind, dest, target != 0) if other is not piece]
+        if others:
+            if all(other.col != from_col for other in others):
+                san += chr(from_col + ord('a'))
+            elif all(other.row != from_row for other in others):
+                san += str(ROWS - from_row)
+            else:
+                san += square_name((from_row, from_col))
+        if target != 0:
+            san += 'x'
+        san += square_name(dest)
+
+    board.make_move(Move((from_row, from_col), dest, promotion))
+    if board.in_check[board.turn]:
+        san += '+' if board.has_legal_moves() else '#'
+    board.unmake_move()
+    return san
+
+
+def moves_to_san(moves, board=None):
+    """Return the SAN for a sequence of Moves played from `board` (default: the start position)."""
+    board = board.copy() if board is not None else Board()
+    sans = []
+    for move in moves:
+        sans.append(move_to_san(board, move))
+        board.make_move(move)
+    return sans
+
+
+def parse_movetext(text):
+    """
+    Split PGN movetext into SAN tokens and a result.
+
+    Move numbers, comments, variations and NAGs are dropped.
+
+    Returns:
+        tuple: (list of SAN strings, result string or None)
+    """
+    text = re.sub(r'\{[^}]*\}|;[^\n]*', ' ', text)
+    # Strip variations, innermost first
+    while '(' in text:
+        stripped = re.sub(r'\([^()]*\)', ' ', text)
+        if stripped == text:
+            break
+        text = stripped
+    sans = []
+    result = None
+    for token in text.split():
+        token = re.sub(r'^\d+\.(\.\.)?', '', token)
+        if not token or token.startswith('$'):
+            continue
+        if token in RESULTS:
+            result = token
+        else:
+            sans.append(token)
+    return sans, result
+
+
+def read_pgn(stream):
+    """
+    Yield the games in a PGN file one at a time.
+
+    Only one game is held in memory at a time, so arbitrarily large files can
+    be streamed.
+
+    Yields:
+        dict: {'headers': {tag: value}, 'moves': [SAN, ...], 'result': str or None}
+    """
+    headers = {}
+    movetext = []
+    for line in stream:
+        line = line.strip()
+        if line.startswith('['):
+            if movetext:
+                yield _pgn_game(headers, movetext)
+                headers, movetext = {}, []
+            match = re.match(r'\[(\w+)\s+"(.*)"\]', line)
+            if match:
+                headers[match.group(1)] = match.group(2)
+        elif line:
+            movetext.append(line)
+        elif movetext:
+            yield _pgn_game(headers, movetext)
+            headers, movetext = {}, []
+    if headers or movetext:
+        yield _pgn_game(headers, movetext)
+
+
+def _pgn_game(headers, movetext):
+    sans, result = parse_movetext(' '.join(movetext))
+    return {'headers': headers, 'moves': sans, 'result': result or headers.get('Result')}
+
+
+def write_pgn(sans, headers=None, result='*', line_width=80):
+    """Return a PGN game with headers, numbered SAN movetext and the result."""
+    headers = dict(headers or {})
+    headers.setdefault('Result', result)
+    lines = [f'[{tag} "{value}"]' for tag, value in headers.items()]
+    lines.append('')
+
+    tokens = []
+    for i, san in enumerate(sans):
+        if i % 2 == 0:
+            tokens.append(f"{i // 2 + 1}.")
+        tokens.append(san)
+    tokens.append(result)
+
+    line = ''
+    for token in tokens:
+        if line and len(line) + 1 + len(token) > line_width:
+            lines.append(line)
+            line = token
+        else:
+            line = f"{line} {token}" if line else token
+    lines.append(line)
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,208 @@
+"""
+Perft: count the leaf nodes of the legal move tree to a fixed depth.
+
+Comparing the counts with published reference numbers is the standard way to
+check a move generator, and the time it takes is a handy speed benchmark.
+
+    python perft.py                      # run the suite to depth 3
+    python perft.py --depth 4 --backend bitboard
+    python perft.py --backend pieces
+    python perft.py --divide "<fen>" --depth 3
+
+The 'pieces' backend builds each position's moves the way bots do, from every
+piece's get_valid_moves() (which filters them with is_in_check_after_move),
+so it checks that path, castling and en passant included, against the same
+reference numbers.
+
+Divide mode lists the node count below every root move for each backend and
+marks the moves where they disagree, which points straight at the bug.
+"""
+
+import argparse
+import time
+
+from chess_rules import Board, Move, ROWS, COLS, PAWN, KING, PROMOTION_CLASSES
+from bitboard import BitBoard, move_to_uci
+from notation import move_to_uci as board_move_to_uci
+
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+# board: Board.legal_moves(); pieces: each piece's get_valid_moves(); bitboard: BitBoard
+BACKENDS = ['board', 'pieces', 'bitboard']
+
+# (name, fen, node counts for depth 1, 2, 3, ...)
+PERFT_POSITIONS = [
+    ("start", START_FEN,
+     [20, 400, 8902, 197281, 4865609]),
+    ("kiwipete", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+     [48, 2039, 97862, 4085603]),
+    ("position 3", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+     [14, 191, 2812, 43238, 674624]),
+    ("position 4", "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+     [6, 264, 9467, 422333]),
+    ("position 5", "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+     [44, 1486, 62379, 2103487]),
+    ("position 6", "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+     [46, 2079, 89890, 3894594]),
+]
+
+
+def perft(board, depth):
+    """Count leaf nodes below a chess_rules.Board position."""
+    if depth == 0:
+        return 1
+    if depth == 1:
+        return sum(1 for _ in board.legal_moves())
+    nodes = 0
+    for move in board.legal_moves():
+        board.make_move(move)
+        nodes += perft(board, depth - 1)
+        board.unmake_move()
+    return nodes
+
+
+def piece_moves(board):
+    """Return the side to move's moves as built from each piece's get_valid_moves()."""
+    moves = []
+    for row in range(ROWS):
+        for col in range(COLS):
+            piece = board.board[row][col]
+            if piece == 0 or piece.color != board.turn:
+                continue
+            if piece.kind == PAWN:
+                targets = piece.get_valid_moves(board, en_passant_target=board.en_passant_target)
+            elif piece.kind == KING:
+                targets = piece.get_valid_moves(board, castle_rights=board.castle_rights)
+            else:
+                targets = piece.get_valid_moves(board)
+            for target in targets:
+                if piece.kind == PAWN and (target[0] == 0 or target[0] == ROWS - 1):
+                    moves.extend(Move((row, col), target, promotion) for promotion in PROMOTION_CLASSES)
+                else:
+                    moves.append(Move((row, col), target))
+    return moves
+
+
+def perft_pieces(board, depth):
+    """Count leaf nodes below a chess_rules.Board position using piece_moves()."""
+    if depth == 0:
+        return 1
+    moves = piece_moves(board)
+    if depth == 1:
+        return len(moves)
+    nodes = 0
+    for move in moves:
+        board.make_move(move)
+        nodes += perft_pieces(board, depth - 1)
+        board.unmake_move()
+    return nodes
+
+
+def perft_bitboard(position, depth):
+    """Count leaf nodes below a BitBoard position."""
+    if depth == 0:
+        return 1
+    moves = position.legal_moves()
+    if depth == 1:
+        return len(moves)
+    nodes = 0
+    for move in moves:
+        position.make_move(move)
+        nodes += perft_bitboard(position, depth - 1)
+        position.unmake_move()
+    return nodes
+
+
+def divide(fen, depth, backend='board'):
+    """Return {root move name: leaf count} for a position."""
+    counts = {}
+    if backend == 'bitboard':
+        position = BitBoard.from_board(Board.from_fen(fen))
+        for move in position.legal_moves():
+            position.make_move(move)
+            counts[move_to_uci(move)] = perft_bitboard(position, depth - 1)
+            position.unmake_move()
+    else:
+        board = Board.from_fen(fen)
+        moves = piece_moves(board) if backend == 'pieces' else list(board.legal_moves())
+        count = perft_pieces if backend == 'pieces' else perft
+        for move in moves:
+            board.make_move(move)
+            counts[board_move_to_uci(move)] = count(board, depth - 1)
+            board.unmake_move()
+    return counts
+
+
+def run_perft(fen, depth, backend='board'):
+    """Return (nodes, seconds) for one position and depth."""
+    board = Board.from_fen(fen)
+    start = time.perf_counter()
+    if backend == 'bitboard':
+        nodes = perft_bitboard(BitBoard.from_board(board), depth)
+    elif backend == 'pieces':
+        nodes = perft_pieces(board, depth)
+    else:
+        nodes = perft(board, depth)
+    return nodes, time.perf_counter() - start
+
+
+def run_suite(max_depth=3, backend='board'):
+    """
+    Run every reference position up to max_depth and print the results.
+
+    Returns:
+        bool: True if every count matched its reference number.
+    """
+    all_passed = True
+    total_nodes = 0
+    total_time = 0.0
+    for name, fen, expected_counts in PERFT_POSITIONS:
+        for depth, expected in enumerate(expected_counts[:max_depth], start=1):
+            nodes, elapsed = run_perft(fen, depth, backend)
+            total_nodes += nodes
+            total_time += elapsed
+            passed = nodes == expected
+            all_passed = all_passed and passed
+            nps = nodes / elapsed if elapsed > 0 else 0
+            status = "ok" if passed else f"FAIL (expected {expected})"
+            print(f"{name:<12} depth {depth}: {nodes:>9} nodes {elapsed:8.3f}s {nps:>10.0f} nps  {status}")
+
+    nps = total_nodes / total_time if total_time > 0 else 0
+    print(f"\nBackend: {backend}")
+    print(f"Total: {total_nodes} nodes in {total_time:.3f}s ({nps:.0f} nps)")
+    print("All counts match." if all_passed else "Some counts do NOT match.")
+    return all_passed
+
+
+def print_divide(fen, depth):
+    """Print per-root-move counts for every backend and flag differences."""
+    counts = {backend: divide(fen, depth, backend) for backend in BACKENDS}
+    mismatches = 0
+    for move in sorted(set().union(*counts.values())):
+        nodes = [counts[backend].get(move, '-') for backend in BACKENDS]
+        marker = '' if len(set(nodes)) == 1 else '  <-- differs'
+        mismatches += bool(marker)
+        columns = '  '.join(f"{backend} {node:>9}" for backend, node in zip(BACKENDS, nodes))
+        print(f"{move:<6} {columns}{marker}")
+    print(f"\nMoves: {' / '.join(str(len(counts[backend])) for backend in BACKENDS)}")
+    print(f"Nodes: {' / '.join(str(sum(counts[backend].values())) for backend in BACKENDS)}")
+    print(f"Root moves that differ: {mismatches}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Perft correctness and speed suite for chess_rules.")
+    parser.add_argument('--depth', type=int, default=3, help="search depth (default 3)")
+    parser.add_argument('--backend', choices=BACKENDS, default='board',
+                        help="move generator to test (default board)")
+    parser.add_argument('--divide', metavar='FEN', nargs='?', const=START_FEN,
+                        help="show per-root-move counts for a position, comparing all backends")
+    args = parser.parse_args()
+
+    if args.divide:
+        print_divide(args.divide, args.depth)
+    elif not run_suite(args.depth, args.backend):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
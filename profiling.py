@@ -0,0 +1,169 @@
+"""
+Call counters for the chess_rules hot paths.
+
+    import profiling
+    profiling.enable()
+    ...                         # play games
+    print(profiling.format_report(profiling.snapshot()))
+    profiling.disable()
+
+enable() replaces the hot Board and piece methods with wrappers that count
+calls and add up the time spent in them. disable() puts the original
+functions back, so while profiling is off the engine runs exactly the code
+it always did and pays nothing.
+
+Counts are kept per scope. The referee in chess_bot_tester switches the
+scope to the agent whose turn it is, so engine calls made while an agent
+thinks are charged to that agent and everything else to 'referee'. Times
+are cumulative: a function's time includes the functions it calls.
+"""
+
+from time import perf_counter
+
+from chess_rules import Board, Pawn, Knight, Bishop, Rook, Queen, King
+
+BOARD_METHODS = [
+    'get_board_state', 'is_square_under_attack', 'is_in_check_after_move', 'is_king_in_check', 'find_king',
+    'game_status', 'has_legal_moves', 'make_move', 'unmake_move', 'position_key', 'copy', 'get_fen',
+]
+GENERATOR_METHODS = ['legal_moves']
+PIECE_CLASSES = [Pawn, Knight, Bishop, Rook, Queen, King]
+
+DEFAULT_SCOPE = 'referee'
+
+enabled = False
+# {scope: {function label: [calls, seconds]}}
+_stats = {}
+_scope_stats = _stats.setdefault(DEFAULT_SCOPE, {})
+_scope = DEFAULT_SCOPE
+# (owner, attribute name, original function) for every installed wrapper
+_originals = []
+
+
+def _counted(func, label):
+    def wrapper(*args, **kwargs):
+        start = perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            entry = _scope_stats.get(label)
+            if entry is None:
+                entry = _scope_stats[label] = [0, 0.0]
+            entry[0] += 1
+            entry[1] += perf_counter() - start
+    wrapper.__wrapped__ = func
+    return wrapper
+
+
+def _counted_generator(func, label):
+    # Time only the work done while the generator is producing values
+    def wrapper(*args, **kwargs):
+        generator = func(*args, **kwargs)
+        entry = _scope_stats.get(label)
+        if entry is None:
+            entry = _scope_stats[label] = [0, 0.0]
+        entry[0] += 1
+        while True:
+            start = perf_counter()
+            try:
+                item = next(generator)
+            except StopIteration:
+                entry[1] += perf_counter() - start
+                return
+            entry[1] += perf_counter() - start
+            yield item
+    wrapper.__wrapped__ = func
+    return wrapper
+
+
+def watch(owner, name, label=None, generator=False):
+    """
+    Count calls to owner.name while profiling is enabled.
+
+    The built-in hot paths are watched by enable(); use this to add others,
+    e.g. watch(SearchAgent, 'evaluate').
+    """
+    func = owner.__dict__[name]
+    wrap = _counted_generator if generator else _counted
+    setattr(owner, name, wrap(func, label or f"{owner.__name__}.{name}"))
+    _originals.append((owner, name, func))
+
+
+def enable():
+    """Install the counting wrappers. Does nothing if already enabled."""
+    global enabled
+    if enabled:
+        return
+    for name in BOARD_METHODS:
+        watch(Board, name)
+    for name in GENERATOR_METHODS:
+        watch(Board, name, generator=True)
+    for piece_class in PIECE_CLASSES:
+        watch(piece_class, 'get_valid_moves')
+    enabled = True
+
+
+def disable():
+    """Restore the original functions. Collected counts are kept."""
+    global enabled
+    while _originals:
+        owner, name, func = _originals.pop()
+        setattr(owner, name, func)
+    enabled = False
+
+
+def set_scope(name):
+    """
+    Charge the following calls to scope `name`.
+
+    Returns:
+        str: The previous scope, so callers can switch back.
+    """
+    global _scope, _scope_stats
+    previous = _scope
+    _scope = name
+    _scope_stats = _stats.setdefault(name, {})
+    return previous
+
+
+def record(label, seconds, scope=None):
+    """Add one call of `seconds` to a label, e.g. an agent's choose_move time."""
+    entry = _stats.setdefault(scope or _scope, {}).setdefault(label, [0, 0.0])
+    entry[0] += 1
+    entry[1] += seconds
+
+
+def reset():
+    """Clear all counts."""
+    global _scope_stats
+    _stats.clear()
+    _scope_stats = _stats.setdefault(_scope, {})
+
+
+def snapshot():
+    """Return a copy of the counts: {scope: {label: (calls, seconds)}}."""
+    return {scope: {label: tuple(entry) for label, entry in counts.items()}
+            for scope, counts in _stats.items() if counts}
+
+
+def merge(total, counts):
+    """Add a snapshot into a running total (a dict of the same shape) and return the total."""
+    for scope, labels in counts.items():
+        scope_total = total.setdefault(scope, {})
+        for label, (calls, seconds) in labels.items():
+            old_calls, old_seconds = scope_total.get(label, (0, 0.0))
+            scope_total[label] = (old_calls + calls, old_seconds + seconds)
+    return total
+
+
+def format_report(counts, limit=None):
+    """Format a snapshot as a table per scope, slowest functions first."""
+    lines = []
+    for scope in sorted(counts):
+        lines.append(f"\n{scope}")
+        lines.append(f"  {'function':<32} {'calls':>12} {'total s':>10} {'per call us':>12}")
+        rows = sorted(counts[scope].items(), key=lambda item: item[1][1], reverse=True)
+        for label, (calls, seconds) in rows[:limit]:
+            per_call = seconds / calls * 1e6 if calls else 0.0
+            lines.append(f"  {label:<32} {calls:>12} {seconds:>10.3f} {per_call:>12.2f}")
+    return '\n'.join(lines)
@@ -0,0 +1,338 @@
+"""
+Reference alpha-beta search agent.
+
+SearchAgent plays with the same choose_move(board) interface as RandomAgent.
+It searches with iterative deepening inside a per-move time budget:
+alpha-beta with a transposition table, MVV-LVA capture ordering, killer and
+history heuristics, a check extension and quiescence search over captures.
+Captures that static exchange evaluation (Board.see) says lose material are
+tried last in the main search and skipped in quiescence.
+
+Its strength makes it a useful baseline for other bots, and the search is a
+realistic workload for benchmarking chess_rules.
+"""
+
+import time
+
+from chess_rules import PAWN, QUEEN, PIECE_VALUES
+
+MATE_SCORE = 100000
+INFINITY = 1000000
+# Scores beyond this are mate scores and are stored relative to the node
+MATE_THRESHOLD = MATE_SCORE - 1000
+
+# Transposition table entry flags
+EXACT, LOWER_BOUND, UPPER_BOUND = 0, 1, 2
+
+# Evasions searched in quiescence when a capture gives check
+MAX_QUIESCENCE_CHECK_PLIES = 4
+
+
+class SearchTimeout(Exception):
+    """Raised inside the search when the time budget runs out."""
+
+
+class TranspositionTable:
+    """
+    Fixed-size hash table of search results keyed by Board.position_key().
+
+    Each slot holds one entry. A new result replaces the stored one if the
+    stored one is for the same position, came from an earlier search, or was
+    searched less deeply.
+    """
+
+    def __init__(self, bits=18):
+        self.mask = (1 << bits) - 1
+        self.entries = [None] * (1 << bits)
+        self.generation = 0
+
+    def new_search(self):
+        """Mark existing entries as old, so they are replaced first."""
+        self.generation += 1
+
+    def probe(self, key):
+        """Return (key, depth, score, flag, move, generation) for the position, or None."""
+        entry = self.entries[key & self.mask]
+        if entry is not None and entry[0] == key:
+            return entry
+        return None
+
+    def store(self, key, depth, score, flag, move):
+        index = key & self.mask
+        entry = self.entries[index]
+        if entry is None or entry[0] == key or entry[5] != self.generation or depth >= entry[1]:
+            self.entries[index] = (key, depth, score, flag, move, self.generation)
+
+
+class SearchAgent:
+    def __init__(self, color, time_limit=1.0, max_depth=64, tt_bits=18, eval_tables=None):
+        """
+        Args:
+            color (str): 'white' or 'black'.
+            time_limit (float): Seconds to spend on each move.
+            max_depth (int): Deepest iteration to search.
+            tt_bits (int): The transposition table holds 2 ** tt_bits entries.
+            eval_tables (dict): Evaluation tables from chess_rules.build_eval_tables,
+                or None for the Board's defaults.
+        """
+        self.color = color
+        self.eval_tables = eval_tables
+        self.time_limit = time_limit
+        self.base_time_limit = time_limit
+        self.max_depth = max_depth
+        self.tt = TranspositionTable(tt_bits)
+        self.nodes = 0
+        self.last_depth = 0
+        self.last_score = 0
+
+    def set_clock(self, remaining, increment):
+        """
+        Fit the per-move budget to the referee's clock.
+
+        Args:
+            remaining (float or None): Seconds left on this agent's clock, None if untimed.
+            increment (float): Seconds added after each move.
+        """
+        if remaining is None:
+            self.time_limit = self.base_time_limit
+        else:
+            # Plan for about 30 more moves and keep a margin so the flag never falls
+            budget = remaining / 30 + increment * 0.8
+            self.time_limit = max(0.01, min(self.base_time_limit, budget, remaining * 0.5))
+
+    def choose_move(self, board):
+        """
+        Pick a move for the side to move.
+
+        Returns:
+            tuple: (piece, (row, col)) like the other agents, or (None, None)
+            if there are no legal moves.
+        """
+        move = self.search(board)
+        if move is None:
+            return None, None
+        return board.board[move.start[0]][move.start[1]], move.end
+
+    def stop(self):
+        """End a running search from another thread; it returns its best move so far."""
+        self.deadline = 0.0
+
+    def set_deadline(self, seconds):
+        """Let a running search go on for `seconds` more, e.g. after a ponder hit."""
+        self.deadline = time.perf_counter() + seconds
+
+    def expected_reply(self, board, move):
+        """
+        Return the reply the last search expects to `move`, or None.
+
+        The reply comes from the transposition table, so it is only known after
+        searching the position.
+        """
+        board = board.copy()
+        board.make_move(move)
+        entry = self.tt.probe(board.position_key())
+        if entry is None or entry[4] is None:
+            return None
+        if entry[4] not in board.legal_moves():
+            return None
+        return entry[4]
+
+    def search(self, board):
+        """Return the best Move found within the time budget, or None."""
+        # Search a copy so the caller's board is never left mid-search
+        board = board.copy()
+        if self.eval_tables is not None:
+            board.set_eval_tables(self.eval_tables)
+        moves = self._legal_moves(board)
+        if not moves:
+            return None
+
+        self.tt.new_search()
+        self.nodes = 0
+        self.killers = [[None, None] for _ in range(self.max_depth + MAX_QUIESCENCE_CHECK_PLIES + 64)]
+        self.history = {}
+        self.deadline = time.perf_counter() + self.time_limit
+
+        best_move = moves[0]
+        for depth in range(1, self.max_depth + 1):
+            self.root_best = None
+            try:
+                score = self._negamax(board, depth, -INFINITY, INFINITY, 0)
+            except SearchTimeout:
+                # A partly searched iteration still beats the last one if it
+                # finished at least one root move, which starts with the old best
+                if self.root_best is not None:
+                    best_move = self.root_best
+                break
+            best_move = self.root_best or best_move
+            self.last_depth = depth
+            self.last_score = score
+            if abs(score) >= MATE_THRESHOLD:
+                break
+        return best_move
+
+    def _legal_moves(self, board):
+        # play_game always promotes to a queen, so underpromotions aren't searched
+        return [move for move in board.legal_moves() if move.promotion in (None, 'queen')]
+
+    def _is_capture(self, board, move):
+        piece = board.board[move.start[0]][move.start[1]]
+        return board.board[move.end[0]][move.end[1]] != 0 or (piece.kind == PAWN and move.start[1] != move.end[1])
+
+    def _capture_score(self, board, move):
+        """MVV-LVA: most valuable victim first, then least valuable attacker."""
+        attacker = board.board[move.start[0]][move.start[1]]
+        victim = board.board[move.end[0]][move.end[1]]
+        victim_value = PIECE_VALUES[victim.kind] if victim != 0 else PIECE_VALUES[PAWN]
+        return victim_value * 10 - PIECE_VALUES[attacker.kind] + (PIECE_VALUES[QUEEN] if move.promotion else 0)
+
+    def _is_losing_capture(self, board, move):
+        attacker = board.board[move.start[0]][move.start[1]]
+        victim = board.board[move.end[0]][move.end[1]]
+        # Taking a piece worth at least the capturer can't lose material, so skip the SEE
+        if victim != 0 and PIECE_VALUES[victim.kind] >= PIECE_VALUES[attacker.kind]:
+            return False
+        return board.see(move) < 0
+
+    def _order_moves(self, board, moves, tt_move, ply):
+        killers = self.killers[ply]
+        history = self.history
+
+        def score(move):
+            if move == tt_move:
+                return 10000000
+            if self._is_capture(board, move) or move.promotion:
+                if not move.promotion and self._is_losing_capture(board, move):
+                    return -1000000 + self._capture_score(board, move)
+                return 1000000 + self._capture_score(board, move)
+            if move == killers[0]:
+                return 900000
+            if move == killers[1]:
+                return 800000
+            return history.get((move.start, move.end), 0)
+
+        return sorted(moves, key=score, reverse=True)
+
+    def _check_time(self):
+        # A node costs hundreds of microseconds here, so reading the clock at
+        # every one is cheap and keeps the search (and stop()) within a node of the deadline
+        self.nodes += 1
+        if time.perf_counter() >= self.deadline:
+            raise SearchTimeout
+
+    def _negamax(self, board, depth, alpha, beta, ply):
+        self._check_time()
+        key = board.position_key()
+        if ply > 0 and (board.board_state_counts.get(key, 0) >= 2 or board.is_fifty_move_rule()):
+            return 0
+
+        in_check = board.in_check[board.turn]
+        if in_check:
+            depth += 1
+        if depth <= 0:
+            return self._quiescence(board, alpha, beta, ply, 0)
+
+        tt_move = None
+        entry = self.tt.probe(key)
+        if entry is not None:
+            tt_move = entry[4]
+            if entry[1] >= depth and ply > 0:
+                score = self._score_from_tt(entry[2], ply)
+                flag = entry[3]
+                if (flag == EXACT or (flag == LOWER_BOUND and score >= beta)
+                        or (flag == UPPER_BOUND and score <= alpha)):
+                    return score
+
+        moves = self._legal_moves(board)
+        if not moves:
+            return -MATE_SCORE + ply if in_check else 0
+
+        original_alpha = alpha
+        best_score = -INFINITY
+        best_move = None
+        for move in self._order_moves(board, moves, tt_move, ply):
+            is_quiet = not self._is_capture(board, move) and not move.promotion
+            board.make_move(move)
+            score = -self._negamax(board, depth - 1, -beta, -alpha, ply + 1)
+            board.unmake_move()
+
+            if score > best_score:
+                best_score = score
+                best_move = move
+                if score > alpha:
+                    alpha = score
+                    if ply == 0:
+                        self.root_best = move
+            if alpha >= beta:
+                if is_quiet:
+                    killers = self.killers[ply]
+                    if killers[0] != move:
+                        killers[1] = killers[0]
+                        killers[0] = move
+                    history_key = (move.start, move.end)
+                    self.history[history_key] = self.history.get(history_key, 0) + depth * depth
+                break
+
+        if best_score <= original_alpha:
+            flag = UPPER_BOUND
+        elif best_score >= beta:
+            flag = LOWER_BOUND
+        else:
+            flag = EXACT
+        self.tt.store(key, depth, self._score_to_tt(best_score, ply), flag, best_move)
+        return best_score
+
+    def _quiescence(self, board, alpha, beta, ply, check_plies):
+        """Search captures (and check evasions) until the position is quiet."""
+        self._check_time()
+        # Evasions search every legal move, so only they can prove mate; past
+        # the check ply limit a checked side stands pat like any other
+        evading = board.in_check[board.turn] and check_plies < MAX_QUIESCENCE_CHECK_PLIES
+
+        if evading:
+            moves = self._legal_moves(board)
+            if not moves:
+                return -MATE_SCORE + ply
+            check_plies += 1
+        else:
+            stand_pat = self.evaluate(board)
+            if stand_pat >= beta:
+                return stand_pat
+            if stand_pat > alpha:
+                alpha = stand_pat
+            moves = [move for move in self._legal_moves(board)
+                     if move.promotion or (self._is_capture(board, move) and not self._is_losing_capture(board, move))]
+            moves.sort(key=lambda move: self._capture_score(board, move), reverse=True)
+
+        best_score = -INFINITY if evading else alpha
+        for move in moves:
+            board.make_move(move)
+            score = -self._quiescence(board, -beta, -alpha, ply + 1, check_plies)
+            board.unmake_move()
+            if score > best_score:
+                best_score = score
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                break
+        return best_score
+
+    def evaluate(self, board):
+        """Leaf evaluation from the side to move's point of view, kept up to date by the Board."""
+        return board.evaluate()
+
+    @staticmethod
+    def _score_to_tt(score, ply):
+        if score >= MATE_THRESHOLD:
+            return score + ply
+        if score <= -MATE_THRESHOLD:
+            return score - ply
+        return score
+
+    @staticmethod
+    def _score_from_tt(score, ply):
+        if score >= MATE_THRESHOLD:
+            return score - ply
+        if score <= -MATE_THRESHOLD:
+            return score + ply
+        return score
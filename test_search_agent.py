@@ -0,0 +1,50 @@
+import time
+
+from chess_rules import Board, Move
+from search_agent import SearchAgent, INFINITY, MATE_SCORE, MATE_THRESHOLD, MAX_QUIESCENCE_CHECK_PLIES
+
+KIWIPETE = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+
+
+def test_finds_mate_in_one():
+    board = Board.from_fen("6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1")
+    agent = SearchAgent('white', time_limit=5.0, max_depth=3)
+    assert agent.search(board) == Move((7, 0), (0, 0))
+    assert agent.last_score >= MATE_THRESHOLD
+
+
+def test_finds_mate_in_two():
+    # 1. Kf7 Kh7 2. Rh1#
+    board = Board.from_fen("7k/8/5K2/8/8/8/8/6R1 w - - 0 1")
+    agent = SearchAgent('white', time_limit=10.0, max_depth=4)
+    assert agent.search(board) == Move((2, 5), (1, 5))
+    assert agent.last_score == MATE_SCORE - 3
+
+
+def test_takes_hanging_queen():
+    board = Board.from_fen("4k3/8/8/3q4/8/8/3R4/4K3 w - - 0 1")
+    agent = SearchAgent('white', time_limit=5.0, max_depth=3)
+    piece, end = agent.choose_move(board)
+    assert (piece.row, piece.col, end) == (6, 3, (3, 3))
+
+
+def test_quiescence_in_check_at_ply_limit_is_not_mate():
+    # White is in check from the h1 queen but can block or take. Past the check
+    # ply limit quiescence stands pat instead of searching evasions, so it must
+    # not report mate; the position is too quiet for a search to reach that limit
+    board = Board.from_fen("3k3r/3p1pb1/BN3np1/3p4/1p6/8/PPP2P1P/R3K2q w Q - 0 9")
+    agent = SearchAgent('white')
+    agent.nodes = 0
+    agent.deadline = float('inf')
+    score = agent._quiescence(board, -INFINITY, INFINITY, 0, MAX_QUIESCENCE_CHECK_PLIES)
+    assert -MATE_THRESHOLD < score < MATE_THRESHOLD
+
+
+def test_keeps_to_time_limit():
+    board = Board.from_fen(KIWIPETE)
+    agent = SearchAgent('white', time_limit=0.05)
+    start = time.perf_counter()
+    move = agent.search(board)
+    elapsed = time.perf_counter() - start
+    assert move in list(board.legal_moves())
+    assert elapsed < 0.1
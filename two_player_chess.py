@@ -1,59 +1,67 @@
 import pygame
 import sys
 from chess_rules import Board  # Import Board class from chess_rules
+import chess_ui
 
 # Constants for display
 WIDTH, HEIGHT = 640, 640
 SQUARE_SIZE = WIDTH // 8
-WHITE = (245, 245, 220)
-BROWN = (139, 69, 19)
-BLUE = (0, 0, 255)
 
-def draw_squares(win):
-    """Draw the chessboard squares."""
-    for row in range(8):
-        for col in range(8):
-            color = WHITE if (row + col) % 2 == 0 else BROWN
-            pygame.draw.rect(win, color, (col * SQUARE_SIZE, row * SQUARE_SIZE, SQUARE_SIZE, SQUARE_SIZE))
+def game_over_text(board):
+    """Return the banner text if the game has ended, otherwise None."""
+    status = board.game_status()
+    if status.status == 'checkmate':
+        winner = "White" if board.turn == 'black' else "Black"
+        return f"{winner} is checkmated! {'Black' if board.turn == 'white' else 'White'} wins!"
+    if status.status == 'stalemate':
+        return "Stalemate! It's a draw!"
+    return None
 
 def main():
-    pygame.init()
-    win = pygame.display.set_mode((WIDTH, HEIGHT))
-    pygame.display.set_caption("Chess")
-    clock = pygame.time.Clock()
-
-    # Initialize the board
+    # Initialize the board, which opens the window
     board = Board(use_pygame_ui=True)
+    board.print_game_over = False  # The banner announces the result
+    win = board.win
+    renderer = chess_ui.BoardRenderer(board.images)
+
+    # Legal moves and the game status are worked out in the background once per
+    # position; a click that arrives before they are ready waits for them
+    worker = chess_ui.PositionWorker()
+    worker.submit(board)
+    pending_click = None
+
+    # Only repaint after something happened; while idle the loop sleeps in event.wait()
+    needs_redraw = True
+    while True:
+        if needs_redraw:
+            dirty = renderer.render(board, win)
+            message = game_over_text(board) if worker.ready(board) else None
+            if message:
+                dirty.append(board.display_game_over(win, message))
+            pygame.display.update(dirty)
+            needs_redraw = False
 
-    run = True
-    while run:
-        clock.tick(60)
-        
         # Event handling
-        for event in pygame.event.get():
+        for event in [pygame.event.wait()] + pygame.event.get():
             if event.type == pygame.QUIT:
-                run = False
                 pygame.quit()
                 sys.exit()
             elif event.type == pygame.MOUSEBUTTONDOWN:
-                pos = pygame.mouse.get_pos()
-                row = pos[1] // SQUARE_SIZE
-                col = pos[0] // SQUARE_SIZE
-                board.select_piece(row, col)
-
-        # Check for game end conditions
-        if board.is_checkmate():
-            winner = "White" if board.turn == 'black' else "Black"
-            board.display_game_over(win, f"{winner} is checkmated! {'Black' if board.turn == 'white' else 'White'} wins!")
-        elif board.is_stalemate():
-            board.display_game_over(win, "Stalemate! It's a draw!")
-
-        # Draw board and pieces
-        draw_squares(win)
-        board.draw(win)  # Pass the window to the draw function
-        pygame.display.flip()
+                x, y = event.pos
+                pending_click = (y // SQUARE_SIZE, x // SQUARE_SIZE)
+            elif event.type == chess_ui.POSITION_READY:
+                needs_redraw = worker.apply(board, event) or needs_redraw
+            elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                renderer.invalidate()
+                needs_redraw = True
 
-    pygame.quit()
+            if pending_click and worker.ready(board):
+                plies = len(board.undo_stack)
+                board.select_piece(*pending_click)
+                pending_click = None
+                if len(board.undo_stack) != plies:
+                    worker.submit(board)
+                needs_redraw = True
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()